@@ -0,0 +1,191 @@
+"""
+Аутентификация по JWT без обращения к базе данных.
+
+Токены, выданные get_tokens_for_user, содержат роль и признаки
+администратора пользователя. По ним права проверяются без запроса
+к таблице пользователей, а сама строка пользователя загружается,
+только если представлению нужны другие её поля.
+
+Список отзывов (denylist) хранится в памяти процесса. Если сервер
+запущен в несколько процессов, отзыв токена и отметка об изменении
+пользователя действуют только в процессе, который их получил (отметки
+об изменении ставятся сигналами в процессе, сохранившем пользователя).
+Такой развёртке нужен короткий ACCESS_TOKEN_LIFETIME или
+DEFAULT_AUTHENTICATION_CLASSES с обычной JWTAuthentication.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import CustomUser
+
+USER_CLAIMS = ("role", "is_staff", "is_admin")
+
+
+def get_user_claims(user):
+    """Возвращает claims пользователя, которые добавляются в токен."""
+    return {
+        "role": user.role,
+        "is_staff": user.is_staff,
+        "is_admin": user.is_admin,
+    }
+
+
+class TokenDenylist:
+    """
+    Ограниченный по размеру список отзывов в памяти процесса.
+
+    Хранит отозванные токены (по jti) и отметки об изменении
+    пользователей: claims токенов, выданных до такой отметки,
+    считаются устаревшими. Записи живут не дольше срока действия
+    токена, при переполнении вытесняются самые старые.
+
+    Вытесненная отметка об изменении не теряется: claims всех токенов,
+    выданных до неё, тоже считаются устаревшими, и права их владельцев
+    проверяются по базе данных, пока эти токены не истекут.
+    """
+
+    def __init__(self, max_size, lifetime):
+        self.max_size = max_size
+        self.lifetime = lifetime
+        self.entries = OrderedDict()
+        self.evicted_change_at = 0
+        self.lock = threading.Lock()
+
+    def add(self, key, value):
+        with self.lock:
+            now = time.time()
+            self.entries[key] = (value, now + self.lifetime)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                key, (value, expires_at) = self.entries.popitem(last=False)
+                if key.startswith("user:") and expires_at > now:
+                    self.evicted_change_at = max(
+                        self.evicted_change_at, value
+                    )
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.evicted_change_at = 0
+
+    def revoke_token(self, token):
+        """Отзывает токен."""
+        self.add(f"jti:{token[api_settings.JTI_CLAIM]}", True)
+
+    def is_revoked(self, token):
+        return bool(self.get(f"jti:{token.get(api_settings.JTI_CLAIM)}"))
+
+    def mark_user_changed(self, user_id):
+        """Помечает claims всех ранее выданных токенов как устаревшие."""
+        self.add(f"user:{user_id}", time.time())
+
+    def mark_all_changed(self):
+        """
+        Помечает claims токенов всех пользователей как устаревшие,
+        например после массовой записи пользователей в обход сигналов.
+        """
+        with self.lock:
+            self.evicted_change_at = time.time()
+
+    def has_fresh_claims(self, token):
+        changed_at = max(
+            self.get(f"user:{token[api_settings.USER_ID_CLAIM]}") or 0,
+            self.evicted_change_at,
+        )
+        issued_at = token["exp"] - self.lifetime
+        return issued_at > changed_at
+
+
+denylist = TokenDenylist(
+    max_size=settings.JWT_DENYLIST_SIZE,
+    lifetime=api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+)
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    """
+    Пользователь, права которого известны из claims токена.
+
+    Идентификатор, роль и признаки администратора читаются из токена,
+    при обращении к остальным атрибутам пользователь загружается из базы.
+    """
+
+    def __init__(self, user_model, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(
+            lambda: user_model.objects.get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        )
+        self.__dict__["_claims"] = {
+            "pk": user_id,
+            "id": user_id,
+            **{claim: token[claim] for claim in USER_CLAIMS},
+        }
+
+    def _get_claim(name):
+        def getter(self):
+            if self._wrapped is empty:
+                return self.__dict__["_claims"][name]
+            return getattr(self._wrapped, name)
+
+        return property(getter)
+
+    pk = _get_claim("pk")
+    id = _get_claim("id")
+    role = _get_claim("role")
+    is_staff = _get_claim("is_staff")
+    is_admin = _get_claim("is_admin")
+
+    del _get_claim
+
+    @property
+    def is_moderator(self):
+        return self.role == CustomUser.Roles.MODERATOR
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, которая не загружает пользователя из базы,
+    если токен содержит актуальные claims роли.
+
+    Токены без claims и токены пользователей, изменённых после выдачи
+    токена, обрабатываются как обычно - с загрузкой пользователя.
+    """
+
+    def get_user(self, validated_token):
+        if denylist.is_revoked(validated_token):
+            raise AuthenticationFailed("Токен отозван", code="token_revoked")
+        if (
+            api_settings.USER_ID_CLAIM not in validated_token
+            or any(claim not in validated_token for claim in USER_CLAIMS)
+            or not denylist.has_fresh_claims(validated_token)
+        ):
+            return super().get_user(validated_token)
+        return TokenClaimsUser(self.user_model, validated_token)
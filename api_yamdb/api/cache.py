@@ -0,0 +1,229 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+
+KEY_PREFIX = "api"
+GLOBAL_NAMESPACE = "all"
+
+# Заголовки, которые вычисляются для каждого ответа заново
+# и не сохраняются в кэше вместе с телом.
+UNCACHED_HEADERS = {
+    "etag",
+    "last-modified",
+    "set-cookie",
+    "server-timing",
+    "x-query-count",
+}
+
+
+def get_cache():
+    """Возвращает кэш, в котором хранятся ответы API."""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_namespace_key(namespace):
+    return f"{KEY_PREFIX}:namespace:{namespace}"
+
+
+def get_modified_key(namespace):
+    return f"{KEY_PREFIX}:modified:{namespace}"
+
+
+def get_versions(namespaces):
+    """
+    Возвращает текущие версии пространств имён кэша.
+
+    Отсутствующая версия инициализируется текущим временем, чтобы после
+    вытеснения счётчика из кэша не совпасть со старыми ключами.
+    """
+    cache = get_cache()
+    keys = [get_namespace_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_last_modified(namespaces):
+    """
+    Возвращает время последнего сброса пространств имён в секундах.
+    Отсутствующая отметка инициализируется текущим временем: данные
+    точно не менялись позже.
+    """
+    cache = get_cache()
+    keys = [get_modified_key(namespace) for namespace in namespaces]
+    stamps = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, now, None)
+            stamps[key] = cache.get(key, now)
+    return max(stamps.values())
+
+
+def invalidate(*namespaces):
+    """Сбрасывает все ответы, зависящие от пространств имён."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = get_namespace_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    now = time.time()
+    cache.set_many(
+        {get_modified_key(namespace): now for namespace in namespaces}, None
+    )
+
+
+def get_lookup_value(model, field_name, value):
+    """
+    Приводит значение из URL к виду, в котором сигналы называют
+    пространство имён объекта: /titles/05/ и /titles/5/ - это titles:5.
+    Некорректное значение возвращается как есть: такой объект
+    не найдётся, и ответ не закэшируется.
+    """
+    if field_name == "pk":
+        field = model._meta.pk
+    else:
+        field = model._meta.get_field(field_name)
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        return value
+
+
+def get_response_key(request, namespaces):
+    """
+    Строит ключ ответа по пути, нормализованной строке запроса,
+    формату ответа и версиям пространств имён. Параметры сортируются
+    по имени, а повторяющиеся значения параметра сохраняют порядок:
+    фильтры берут последнее из них.
+    """
+    namespaces = (GLOBAL_NAMESPACE, *namespaces)
+    query = sorted(request.query_params.lists(), key=lambda item: item[0])
+    parts = (
+        request.path,
+        repr(query),
+        request.accepted_media_type,
+        repr(list(zip(namespaces, get_versions(namespaces)))),
+    )
+    digest = hashlib.md5("\n".join(parts).encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:response:{digest}"
+
+
+def get_etag(request, namespaces):
+    """
+    Слабый ETag ответа: ключ кэша ответа (путь, параметры, формат,
+    версии пространств имён) и пользователь, для которого он построен.
+    """
+    key = get_response_key(request, namespaces)
+    user = getattr(request, "user", None)
+    digest = hashlib.md5(
+        f"{key}\n{getattr(user, 'pk', None)}".encode("utf-8")
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ResponseCacheMixin:
+    """Миксин кэша анонимных GET-запросов и условных GET-запросов."""
+
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_namespaces(self):
+        """Возвращает пространства имён, от которых зависит ответ."""
+        if self.action == "retrieve":
+            lookup = get_lookup_value(
+                self.queryset.model,
+                self.lookup_field,
+                self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+            )
+            own = f"{self.basename}:{lookup}"
+        else:
+            own = self.basename
+        return (own, *self.cache_dependencies)
+
+    def is_cacheable(self, request):
+        return (
+            request.method == "GET"
+            and "HTTP_AUTHORIZATION" not in request.META
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.method != "GET":
+            return handler(request, *args, **kwargs)
+        namespaces = self.get_cache_namespaces()
+        etag = get_etag(request, namespaces)
+        last_modified = math.floor(
+            get_last_modified((GLOBAL_NAMESPACE, *namespaces))
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.get_stored_response(
+                handler, request, namespaces, *args, **kwargs
+            )
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            response["ETag"] = etag
+            if last_modified < math.floor(time.time()):
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_stored_response(
+        self, handler, request, namespaces, *args, **kwargs
+    ):
+        """Берёт ответ из кэша или строит и сохраняет его."""
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+        key = get_response_key(request, namespaces)
+        cached = get_cache().get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for name, value in headers:
+                response[name] = value
+            return response
+        response = handler(request, *args, **kwargs)
+        if (
+            response.status_code == status.HTTP_200_OK
+            and not response.streaming
+        ):
+
+            def store(rendered):
+                headers = [
+                    (name, value)
+                    for name, value in rendered.items()
+                    if name.lower() not in UNCACHED_HEADERS
+                ]
+                get_cache().set(
+                    key,
+                    (rendered.content, headers),
+                    settings.RESPONSE_CACHE_TIMEOUT,
+                )
+
+            response.add_post_render_callback(store)
+        return response
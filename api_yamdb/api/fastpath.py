@@ -0,0 +1,163 @@
+"""
+Быстрое чтение списков без сериализаторов.
+
+Для list категорий, жанров и произведений ответ строится прямо из строк
+values_list: у каждого маппера заранее заданы колонки запроса и порядок
+ключей, поэтому на строку приходится одно создание словаря вместо
+экземпляров полей сериализатора. Результат совпадает с ответом
+CategorySerializer, GenreSerializer и TitleGetSerializer побайтно
+(см. tests/test_27_fast_read_path.py); при изменении сериализатора
+нужно поменять и маппер.
+
+Быстрый путь выключается настройкой FAST_READ_PATH = False и не
+используется, если запрошены fields или expand (см. SparseFieldsMixin).
+
+Список без пагинации читается итератором values_list и, если в нём
+больше JSON_STREAMING_CHUNK_SIZE строк, отдаётся потоком: строки
+представляются и кодируются частями, так что ни весь результат
+запроса, ни весь ответ не держатся в памяти. Потоковые ответы
+не кэшируются.
+"""
+import itertools
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from reviews.models import GenreTitle
+
+
+class ValuesMapper:
+    """Представление объектов с плоскими полями модели."""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+
+    def get_rows(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.fields)
+
+    def represent(self, rows):
+        keys = self.fields
+        return [dict(zip(keys, row)) for row in rows]
+
+    def iter_represent(self, rows, chunk_size):
+        """
+        Представляет строки частями по chunk_size, читая запрос
+        итератором.
+        """
+        rows = rows.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield self.represent(chunk)
+
+
+class TitleValuesMapper(ValuesMapper):
+    """
+    Представление произведений как у TitleGetSerializer: категория
+    одним JOIN, жанры страницы - одним запросом к GenreTitle.
+    """
+
+    def __init__(self):
+        super().__init__(
+            (
+                "id",
+                "category__name",
+                "category__slug",
+                "rating",
+                "name",
+                "year",
+                "description",
+            )
+        )
+
+    def get_genres(self, title_ids):
+        genres = defaultdict(list)
+        for title_id, name, slug in (
+            GenreTitle.objects.filter(title_id__in=title_ids)
+            .order_by("genre__name")
+            .values_list("title_id", "genre__name", "genre__slug")
+        ):
+            genres[title_id].append({"name": name, "slug": slug})
+        return genres
+
+    def represent(self, rows):
+        genres = self.get_genres([row[0] for row in rows])
+        return [
+            {
+                "id": pk,
+                "category": (
+                    None
+                    if category_slug is None
+                    else {"name": category_name, "slug": category_slug}
+                ),
+                "genre": genres.get(pk, []),
+                "rating": None if rating is None else int(rating),
+                "name": name,
+                "year": year,
+                "description": description,
+            }
+            for (
+                pk,
+                category_name,
+                category_slug,
+                rating,
+                name,
+                year,
+                description,
+            ) in rows
+        ]
+
+
+class FastListMixin:
+    """
+    list через values_mapper вместо сериализатора. Фильтры, сортировка
+    и пагинация применяются как обычно.
+    """
+
+    values_mapper = None
+
+    def use_fast_path(self, request):
+        if not settings.FAST_READ_PATH or self.values_mapper is None:
+            return False
+        if hasattr(self, "get_sparse_fields"):
+            fields, expand = self.get_sparse_fields()
+            return fields is None and not expand
+        return True
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_path(request):
+            return super().list(request, *args, **kwargs)
+        rows = self.values_mapper.get_rows(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.values_mapper.represent(page)
+            )
+        return self.get_list_response(request, rows)
+
+    def get_list_response(self, request, rows):
+        """
+        Отдаёт список без пагинации потоком, если выбранный рендерер
+        умеет кодировать частями и строк больше одной части.
+        """
+        chunk_size = settings.JSON_STREAMING_CHUNK_SIZE
+        renderer = request.accepted_renderer
+        if not chunk_size or not hasattr(renderer, "iter_render"):
+            return Response(self.values_mapper.represent(rows))
+        chunks = self.values_mapper.iter_represent(rows, chunk_size)
+        first = next(chunks, [])
+        if len(first) < chunk_size:
+            return Response(first)
+        return StreamingHttpResponse(
+            renderer.iter_render(
+                itertools.chain([first], chunks),
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            ),
+            content_type=request.accepted_media_type,
+        )
@@ -1,4 +1,5 @@
 import django_filters
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
 
@@ -10,7 +11,48 @@ class TitleFilter(django_filters.FilterSet):
         field_name="name", lookup_expr="icontains"
     )
     year = django_filters.NumberFilter(field_name="year")
+    search = django_filters.CharFilter(method="filter_search")
+    rating_min = django_filters.NumberFilter(
+        field_name="rating", lookup_expr="gte"
+    )
+    rating_max = django_filters.NumberFilter(
+        field_name="rating", lookup_expr="lte"
+    )
+    reviews_min = django_filters.NumberFilter(
+        field_name="review_count", lookup_expr="gte"
+    )
+    reviews_max = django_filters.NumberFilter(
+        field_name="review_count", lookup_expr="lte"
+    )
 
     class Meta:
         model = Title
-        fields = ["category", "genre", "name", "year"]
+        fields = [
+            "category",
+            "genre",
+            "name",
+            "year",
+            "search",
+            "rating_min",
+            "rating_max",
+            "reviews_min",
+            "reviews_max",
+        ]
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию произведения."""
+        return queryset.search(value)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка с добавлением id в конце, чтобы порядок страниц был
+    однозначным и совпадал с порядком индексов (поле, -id).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or {"id", "-id", "pk", "-pk"} & set(ordering):
+            return ordering
+        direction = "-" if ordering[-1].startswith("-") else ""
+        return [*ordering, f"{direction}id"]
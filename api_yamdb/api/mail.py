@@ -0,0 +1,285 @@
+"""
+Фоновая очередь исходящих писем.
+
+Класс очереди задаётся настройкой EMAIL_QUEUE["BACKEND"], остальные
+ключи настройки передаются в конструктор очереди в нижнем регистре.
+
+Неудачная отправка не блокирует поток: письмо планируется на повторную
+попытку с экспоненциально растущей задержкой. Очередь в памяти
+(ThreadPoolEmailQueue) живёт только внутри процесса сервера; очередь
+в базе данных (DatabaseEmailQueue) разбирается командой drainmail
+из любого процесса.
+"""
+import logging
+import queue
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from reviews.models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+DATABASE_BACKEND = "api.mail.DatabaseEmailQueue"
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_email_queue(backend=None):
+    """
+    Возвращает очередь писем, заданную в настройках, или очередь класса
+    backend с теми же параметрами.
+    """
+    options = dict(settings.EMAIL_QUEUE)
+    backend = backend or options["BACKEND"]
+    del options["BACKEND"]
+    with _queues_lock:
+        if backend not in _queues:
+            _queues[backend] = import_string(backend)(
+                **{name.lower(): value for name, value in options.items()}
+            )
+        return _queues[backend]
+
+
+class BaseEmailQueue:
+    """Базовая очередь писем."""
+
+    def __init__(self, batch_size=50, max_retries=5, retry_delay=1.0,
+                 **kwargs):
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def enqueue(self, message):
+        """Ставит письмо в очередь на отправку."""
+        raise NotImplementedError
+
+    def drain(self):
+        """Отправляет все письма из очереди и возвращает их количество."""
+        raise NotImplementedError
+
+    def get_retry_delay(self, attempt):
+        """Задержка перед повторной отправкой, растёт экспоненциально."""
+        return self.retry_delay * 2 ** (attempt - 1)
+
+    def deliver(self, messages):
+        """
+        Отправляет письма через одно соединение с почтовым сервером
+        и возвращает список писем, которые отправить не удалось.
+        """
+        connection = None
+        failed = []
+        try:
+            connection = get_connection()
+            connection.open()
+            for message in messages:
+                try:
+                    connection.send_messages([message])
+                except Exception:
+                    logger.warning("Ошибка отправки письма", exc_info=True)
+                    failed.append(message)
+        except Exception:
+            logger.warning("Почтовый сервер недоступен", exc_info=True)
+            return list(messages)
+        finally:
+            if connection is not None:
+                connection.close()
+        return failed
+
+    def send(self, messages, attempt=1):
+        """
+        Отправляет письма попыткой с номером attempt. Неотправленные
+        письма передаются в retry, пока не исчерпано max_retries
+        повторов.
+        """
+        failed = self.deliver(messages)
+        if not failed:
+            return
+        if attempt > self.max_retries:
+            logger.error(
+                "Не удалось отправить писем: %s, адресаты: %s",
+                len(failed),
+                [message.to for message in failed],
+            )
+            return
+        self.retry(failed, attempt)
+
+    def retry(self, messages, attempt):
+        """Планирует повтор писем, не отправленных попыткой attempt."""
+        raise NotImplementedError
+
+
+class ImmediateEmailQueue(BaseEmailQueue):
+    """Отправляет письмо сразу, в потоке запроса."""
+
+    def enqueue(self, message):
+        self.send([message])
+
+    def retry(self, messages, attempt):
+        """Повторяет отправку сразу: поток запроса не должен спать."""
+        self.send(messages, attempt + 1)
+
+    def drain(self):
+        return 0
+
+
+class ThreadPoolEmailQueue(BaseEmailQueue):
+    """
+    Очередь в памяти процесса, которую разбирает пул фоновых потоков.
+    Поток забирает из очереди до batch_size писем и отправляет их
+    через одно соединение. Повторная попытка ставится в очередь
+    таймером, поэтому поток не ждёт задержку и разбирает другие письма.
+
+    Письма, не отправленные до остановки процесса, теряются;
+    команда drainmail эту очередь не видит.
+    """
+
+    def __init__(self, workers=2, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = workers
+        self.queue = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def enqueue(self, message):
+        self.start()
+        self.queue.put((1, message))
+
+    def retry(self, messages, attempt):
+        timer = threading.Timer(
+            self.get_retry_delay(attempt),
+            self.put_many,
+            args=(attempt + 1, messages),
+        )
+        timer.daemon = True
+        timer.start()
+
+    def put_many(self, attempt, messages):
+        for message in messages:
+            self.queue.put((attempt, message))
+
+    def start(self):
+        """Лениво запускает потоки-обработчики."""
+        with self.lock:
+            if self.threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self.work,
+                    name=f"email-queue-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def take_batch(self, block=True):
+        """Забирает из очереди до batch_size писем."""
+        batch = [self.queue.get(block=block)]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def send_batch(self, batch):
+        """Отправляет пачку, в которой могут быть повторы разных попыток."""
+        attempts = defaultdict(list)
+        for attempt, message in batch:
+            attempts[attempt].append(message)
+        for attempt, messages in attempts.items():
+            self.send(messages, attempt)
+
+    def work(self):
+        while True:
+            batch = self.take_batch()
+            try:
+                self.send_batch(batch)
+            except Exception:
+                # Поток не должен завершаться: его никто не перезапустит.
+                logger.exception("Ошибка обработки очереди писем")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def drain(self):
+        count = 0
+        while True:
+            try:
+                batch = self.take_batch(block=False)
+            except queue.Empty:
+                break
+            try:
+                self.send_batch(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            count += len(batch)
+        self.queue.join()
+        return count
+
+
+class DatabaseEmailQueue(BaseEmailQueue):
+    """
+    Очередь в таблице QueuedEmail, которую разбирает команда drainmail.
+    Переживает перезапуск процесса и может разбираться несколькими
+    обработчиками.
+    """
+
+    def enqueue(self, message):
+        QueuedEmail.objects.create(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email,
+            to="\n".join(message.to),
+        )
+
+    def drain(self):
+        count = 0
+        while True:
+            with transaction.atomic():
+                emails = list(
+                    QueuedEmail.objects.select_for_update(skip_locked=True)
+                    .filter(next_attempt_at__lte=timezone.now())
+                    .order_by("pk")[: self.batch_size]
+                )
+                if not emails:
+                    return count
+                count += self.process(emails)
+
+    def process(self, emails):
+        """Отправляет пачку писем и обновляет очередь по результату."""
+        messages = {
+            email.pk: EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.to.split("\n"),
+            )
+            for email in emails
+        }
+        failed = {id(message) for message in self.deliver(messages.values())}
+        sent = {
+            pk for pk, message in messages.items() if id(message) not in failed
+        }
+        QueuedEmail.objects.filter(pk__in=sent).delete()
+        for email in emails:
+            if email.pk in sent:
+                continue
+            email.attempts += 1
+            if email.attempts > self.max_retries:
+                logger.error("Не удалось отправить письмо на %s", email.to)
+                email.delete()
+                continue
+            email.next_attempt_at = timezone.now() + timedelta(
+                seconds=self.get_retry_delay(email.attempts)
+            )
+            email.save(update_fields=("attempts", "next_attempt_at"))
+        return len(sent)
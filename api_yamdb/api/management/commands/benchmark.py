@@ -0,0 +1,216 @@
+import json
+import platform
+import random
+import statistics
+import time
+from typing import Any
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+
+from api.cache import GLOBAL_NAMESPACE, invalidate
+from api.utils import get_tokens_for_user
+
+# Маршруты api/urls.py и параметры URL, которые строятся по случайной
+# паре (произведение, отзыв) из базы данных.
+ROUTES = {
+    "api:category-list": lambda title_id, review_id: {},
+    "api:genre-list": lambda title_id, review_id: {},
+    "api:titles-list": lambda title_id, review_id: {},
+    "api:titles-detail": lambda title_id, review_id: {"pk": title_id},
+    "api:reviews-list": lambda title_id, review_id: {"title_id": title_id},
+    "api:reviews-detail": lambda title_id, review_id: {
+        "title_id": title_id,
+        "pk": review_id,
+    },
+    "api:comments-list": lambda title_id, review_id: {
+        "title_id": title_id,
+        "review_id": review_id,
+    },
+}
+SAMPLE_SIZE = 100
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Возвращает процентиль отсортированного списка (nearest rank)."""
+    index = max(0, -(-len(values) * percent // 100) - 1)
+    return values[index]
+
+
+def summarize(durations, queries, errors, elapsed):
+    """Сводит замеры маршрута в словарь для отчёта."""
+    durations = sorted(durations)
+    summary = {
+        "requests": len(durations),
+        "errors": errors,
+        "throughput_rps": round(len(durations) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(durations), 3),
+    }
+    for percent in PERCENTILES:
+        summary[f"p{percent}_ms"] = round(percentile(durations, percent), 3)
+    summary["max_ms"] = round(durations[-1], 3)
+    if queries:
+        summary["queries"] = {
+            "min": min(queries),
+            "mean": round(statistics.fmean(queries), 2),
+            "max": max(queries),
+        }
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет задержку, пропускную способность и количество запросов "
+        "к базе данных для маршрутов API и выводит отчёт в JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--route",
+            action="append",
+            choices=sorted(ROUTES),
+            help="Маршрут для измерения (по умолчанию - все)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Количество измеряемых запросов к каждому маршруту",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Количество запросов для прогрева перед измерением",
+        )
+        parser.add_argument(
+            "--user",
+            help=(
+                "Имя пользователя, от имени которого выполняются запросы "
+                "(по умолчанию - анонимно)"
+            ),
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Сбрасывать кэш ответов перед каждым запросом",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Начальное значение генератора случайных чисел",
+        )
+        parser.add_argument(
+            "--output",
+            help="Файл для отчёта (по умолчанию - стандартный вывод)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["requests"] < 1:
+            raise CommandError("Количество запросов должно быть больше нуля")
+        self.rng = random.Random(options["seed"])
+        self.cold = options["cold"]
+        self.samples = self.get_samples()
+        if not self.samples:
+            raise CommandError(
+                "В базе нет отзывов, заполните её командой generatedata"
+            )
+        headers = {}
+        if options["user"]:
+            try:
+                user = CustomUser.objects.get(username=options["user"])
+            except CustomUser.DoesNotExist:
+                raise CommandError(
+                    f"Пользователь {options['user']} не найден"
+                )
+            token = get_tokens_for_user(user)["token"]
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        self.client = Client(raise_request_exception=False, **headers)
+        endpoints = {}
+        for name in options["route"] or ROUTES:
+            endpoints[name] = self.measure(
+                name, options["requests"], options["warmup"]
+            )
+        report = {"meta": self.get_meta(options), "endpoints": endpoints}
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def get_samples(self):
+        """
+        Возвращает случайные пары (произведение, отзыв) по диапазону id,
+        не сортируя всю таблицу отзывов.
+        """
+        bounds = Review.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            return []
+        pks = [
+            self.rng.randint(bounds["first"], bounds["last"])
+            for _ in range(SAMPLE_SIZE)
+        ]
+        return list(
+            Review.objects.filter(pk__in=pks)
+            .order_by("pk")
+            .values_list("title_id", "pk")
+        )
+
+    def get_meta(self, options):
+        return {
+            "started_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+            "requests": options["requests"],
+            "warmup": options["warmup"],
+            "authenticated": bool(options["user"]),
+            "cold": self.cold,
+            "seed": options["seed"],
+            "rows": {
+                model._meta.model_name: model.objects.count()
+                for model in (Category, Genre, Title, Review, Comment)
+            },
+        }
+
+    def request(self, path):
+        if self.cold:
+            invalidate(GLOBAL_NAMESPACE)
+        started = time.perf_counter()
+        response = self.client.get(path)
+        return response, (time.perf_counter() - started) * 1000
+
+    def measure(self, name, count, warmup):
+        """Выполняет запросы к маршруту и сводит замеры."""
+        paths = [
+            reverse(name, kwargs=ROUTES[name](*sample))
+            for sample in self.samples
+        ]
+        for _ in range(warmup):
+            self.request(self.rng.choice(paths))
+        durations = []
+        queries = []
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            response, duration = self.request(self.rng.choice(paths))
+            durations.append(duration)
+            if response.status_code >= 400:
+                errors += 1
+            metrics = getattr(response.wsgi_request, "query_metrics", None)
+            if metrics is not None:
+                queries.append(metrics.query_count)
+        return summarize(
+            durations, queries, errors, time.perf_counter() - started
+        )
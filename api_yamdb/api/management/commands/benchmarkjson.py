@@ -0,0 +1,146 @@
+import io
+import json
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Title
+
+from api import renderers
+from api.management.commands.benchmark import percentile
+from api.parsers import FastJSONParser, MessagePackParser
+from api.serializers import ReviewSerializer, TitleGetSerializer
+
+ENCODERS = {
+    "json": (JSONRenderer, JSONParser),
+    "fast": (renderers.FastJSONRenderer, FastJSONParser),
+    "msgpack": (renderers.MessagePackRenderer, MessagePackParser),
+}
+
+
+def measure(function, iterations):
+    """Возвращает длительности вызовов функции в микросекундах."""
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - started) * 1_000_000)
+    return sorted(durations)
+
+
+def summarize(durations):
+    summary = {"mean_us": round(statistics.fmean(durations), 1)}
+    for percent in (50, 95):
+        summary[f"p{percent}_us"] = round(percentile(durations, percent), 1)
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает скорость кодирования и разбора JSON стандартным "
+        "модулем json, рендерером api.renderers (на orjson, если он "
+        "установлен) и MessagePack на данных из базы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--titles",
+            type=int,
+            default=100,
+            help="Количество произведений в списке",
+        )
+        parser.add_argument(
+            "--reviews",
+            type=int,
+            default=100,
+            help="Количество отзывов в списке",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Количество повторов каждого замера",
+        )
+        parser.add_argument(
+            "--output",
+            help="Файл для отчёта (по умолчанию - стандартный вывод)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["iterations"] < 1:
+            raise CommandError("Количество повторов должно быть больше нуля")
+        payloads = self.get_payloads(options["titles"], options["reviews"])
+        if not any(payloads.values()):
+            raise CommandError(
+                "В базе нет данных, заполните её командой generatedata"
+            )
+        report = {
+            "meta": {
+                "fast_backend": (
+                    "orjson" if renderers.orjson is not None else "json"
+                ),
+                "iterations": options["iterations"],
+            },
+            "payloads": {
+                name: self.compare(data, options["iterations"])
+                for name, data in payloads.items()
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def get_payloads(self, titles_count, reviews_count):
+        """Сериализует списки произведений и отзывов, как это делает API."""
+        titles = (
+            Title.objects.select_related("category")
+            .prefetch_related("genre")
+            .order_by("pk")[:titles_count]
+        )
+        reviews = Review.objects.select_related("author").order_by("pk")[
+            :reviews_count
+        ]
+        return {
+            "titles": TitleGetSerializer(titles, many=True).data,
+            "reviews": ReviewSerializer(reviews, many=True).data,
+        }
+
+    def compare(self, data, iterations):
+        """Замеряет кодирование и разбор одних данных всеми кодировщиками."""
+        result = {}
+        contents = {}
+        for name, (renderer_class, parser_class) in ENCODERS.items():
+            renderer = renderer_class()
+            parser = parser_class()
+            content = contents[name] = renderer.render(data)
+            result[name] = {
+                "bytes": len(content),
+                "render": summarize(
+                    measure(lambda: renderer.render(data), iterations)
+                ),
+                "parse": summarize(
+                    measure(
+                        lambda: parser.parse(io.BytesIO(content)),
+                        iterations,
+                    )
+                ),
+            }
+        for operation in ("render", "parse"):
+            result[f"{operation}_speedup"] = round(
+                result["json"][operation]["mean_us"]
+                / result["fast"][operation]["mean_us"],
+                2,
+            )
+            result[f"msgpack_{operation}_speedup"] = round(
+                result["json"][operation]["mean_us"]
+                / result["msgpack"][operation]["mean_us"],
+                2,
+            )
+        result["identical"] = contents["json"] == contents["fast"]
+        return result
@@ -0,0 +1,25 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.mail import DATABASE_BACKEND, get_email_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет все письма из очереди исходящей почты в базе данных "
+        "(таблица QueuedEmail)"
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if settings.EMAIL_QUEUE["BACKEND"] != DATABASE_BACKEND:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Очередь EMAIL_QUEUE хранится в памяти процесса "
+                    "сервера и разбирается им самим; команда отправит "
+                    "только письма из таблицы QueuedEmail"
+                )
+            )
+        sent = get_email_queue(DATABASE_BACKEND).drain()
+        self.stdout.write(self.style.SUCCESS(f"Отправлено писем: {sent}"))
@@ -0,0 +1,231 @@
+"""
+Учёт SQL-запросов и времени обработки запросов к API.
+
+QueryMetricsMiddleware считает запросы к базе данных и их суммарное
+время для каждого запроса, QueryMetricsMixin дополнительно измеряет
+время сериализации и рендеринга ответа во вьюсетах. Результаты
+накапливаются в гистограммах по имени маршрута (например,
+api:titles-list) и доступны в request.query_metrics. В заголовках
+Server-Timing и X-Query-Count они отдаются клиенту только при DEBUG
+или QUERY_METRICS_HEADERS = True: количество запросов и время SQL
+не предназначены для публичных клиентов.
+
+Лимиты запросов задаются настройкой QUERY_BUDGETS по имени маршрута
+("api:titles-list") или по методу и имени маршрута ("GET api:titles-list"),
+реакция на их превышение - настройкой QUERY_BUDGET_ACTION ("log"
+или "raise").
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+DURATION_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class QueryBudgetExceeded(Exception):
+    """Количество запросов к базе данных превысило лимит маршрута."""
+
+
+class RequestMetrics:
+    """Метрики одного запроса к API."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.serialize_time = None
+        self.render_time = None
+        self.total_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL-запроса, см. connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.query_count += 1
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def get_server_timing(self):
+        """Возвращает значение заголовка Server-Timing."""
+        timings = [
+            ("db", self.sql_time, f"{self.query_count} queries"),
+            ("serialize", self.serialize_time, None),
+            ("render", self.render_time, None),
+            ("total", self.total_time, None),
+        ]
+        parts = []
+        for name, duration, description in timings:
+            if duration is None:
+                continue
+            part = f"{name};dur={duration * 1000:.2f}"
+            if description:
+                part += f';desc="{description}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+class Histogram:
+    """Гистограмма значений с фиксированными верхними границами корзин."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}" for bound in self.bounds]
+        labels.append(f">{self.bounds[-1]}")
+        return dict(zip(labels, self.counts))
+
+
+class EndpointStats:
+    """Накопленные метрики маршрута."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_time = 0.0
+        self.total_time = 0.0
+        self.query_histogram = Histogram(QUERY_BUCKETS)
+        self.duration_histogram = Histogram(DURATION_BUCKETS)
+
+    def add(self, metrics):
+        self.requests += 1
+        self.queries += metrics.query_count
+        self.max_queries = max(self.max_queries, metrics.query_count)
+        self.sql_time += metrics.sql_time
+        self.total_time += metrics.total_time
+        self.query_histogram.add(metrics.query_count)
+        self.duration_histogram.add(metrics.total_time * 1000)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": self.queries / self.requests,
+            "max_queries": self.max_queries,
+            "avg_sql_ms": self.sql_time / self.requests * 1000,
+            "avg_total_ms": self.total_time / self.requests * 1000,
+            "queries_histogram": self.query_histogram.as_dict(),
+            "duration_ms_histogram": self.duration_histogram.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    """Метрики всех маршрутов в памяти процесса."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def record(self, view_name, metrics):
+        with self.lock:
+            if view_name not in self.endpoints:
+                self.endpoints[view_name] = EndpointStats()
+            self.endpoints[view_name].add(metrics)
+
+    def snapshot(self):
+        """Возвращает метрики маршрутов в виде словаря."""
+        with self.lock:
+            return {
+                view_name: stats.as_dict()
+                for view_name, stats in sorted(self.endpoints.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+
+registry = MetricsRegistry()
+
+
+def check_query_budget(method, view_name, metrics):
+    """Сообщает о превышении лимита запросов к базе данных."""
+    budgets = settings.QUERY_BUDGETS
+    budget = budgets.get(f"{method} {view_name}", budgets.get(view_name))
+    if budget is None or metrics.query_count <= budget:
+        return
+    message = (
+        f"{method} {view_name}: {metrics.query_count} запросов к базе данных "
+        f"при лимите {budget}"
+    )
+    if settings.QUERY_BUDGET_ACTION == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryMetricsMiddleware:
+    """Считает запросы к базе данных и время обработки запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.query_metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.finish()
+        if settings.DEBUG or settings.QUERY_METRICS_HEADERS:
+            response["Server-Timing"] = metrics.get_server_timing()
+            response["X-Query-Count"] = str(metrics.query_count)
+        match = request.resolver_match
+        if match is not None:
+            registry.record(match.view_name, metrics)
+            check_query_budget(request.method, match.view_name, metrics)
+        return response
+
+
+class QueryMetricsMixin:
+    """
+    Измеряет время сериализации и рендеринга ответа вьюсета.
+
+    Временем сериализации считается время работы обработчика
+    без учёта SQL-запросов.
+    """
+
+    def get_query_metrics(self):
+        return getattr(self.request._request, "query_metrics", None)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        metrics = self.get_query_metrics()
+        if metrics is not None:
+            self.handler_started = (time.perf_counter(), metrics.sql_time)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        metrics = self.get_query_metrics()
+        if metrics is None or not hasattr(self, "handler_started"):
+            return response
+        started, sql_time = self.handler_started
+        metrics.serialize_time = (time.perf_counter() - started) - (
+            metrics.sql_time - sql_time
+        )
+        if hasattr(response, "add_post_render_callback"):
+            render_started = time.perf_counter()
+
+            def measure_render(rendered):
+                metrics.render_time = time.perf_counter() - render_started
+
+            response.add_post_render_callback(measure_render)
+        return response
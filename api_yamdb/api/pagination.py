@@ -0,0 +1,110 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (pub_date, id).
+
+    Вместо OFFSET и COUNT(*) следующая страница выбирается условием
+    по ключу последней записи, поэтому стоимость страницы не зависит
+    от её глубины.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Некорректный курсор."
+    ordering = ("-pub_date", "-id")
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает страницу записей, следующих за курсором."""
+        self.base_url = request.build_absolute_uri()
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        self.has_next = len(results) > self.page_size
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def encode_cursor(self, obj):
+        """Кодирует ключ записи в строку курсора."""
+        position = f"{obj.pub_date.isoformat()}|{obj.pk}"
+        return urlsafe_b64encode(position.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        """Декодирует курсор из запроса; пустой курсор - первая страница."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = urlsafe_b64decode(encoded).decode("ascii")
+            pub_date, pk = position.split("|")
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (DecodeError, UnicodeDecodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
+
+
+class FeedPagination(PageNumberPagination):
+    """
+    Постраничная пагинация лент отзывов и комментариев.
+
+    Параметр `cursor` в запросе (в том числе пустой) включает
+    пагинацию по ключу, параметр `page_size` задаёт размер страницы
+    (не больше FEED_MAX_PAGE_SIZE) в обоих режимах.
+    """
+
+    keyset_class = KeysetPagination
+    page_size_query_param = "page_size"
+    max_page_size = settings.FEED_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
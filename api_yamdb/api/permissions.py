@@ -58,7 +58,7 @@ class RolesPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (
-            obj.author == request.user
+            obj.author_id == request.user.pk
             or request.method in permissions.SAFE_METHODS
             or request.user.is_authenticated
             and (request.user.is_admin or request.user.is_moderator)
@@ -0,0 +1,143 @@
+"""
+Быстрый рендерер JSON и рендерер MessagePack.
+
+Если установлен orjson, ответы кодируются им, иначе - стандартным
+модулем json, как в JSONRenderer из DRF. Результат в обоих случаях
+совпадает побайтно: компактные разделители, UTF-8 без экранирования,
+экранированные U+2028 и U+2029, даты в формате DRF. Данные, которые
+orjson кодирует иначе, чем json (ключи словаря не строки, NaN
+и бесконечности), а также ответы с отступами кодируются стандартным
+модулем.
+
+Большие списки можно отдавать потоком: iter_render кодирует список
+по частям, не собирая его целиком (см. api.fastpath).
+
+MessagePack (application/msgpack) выбирается заголовком Accept;
+по умолчанию ответы остаются в JSON. msgpack указан в requirements.txt:
+если он не установлен, создание рендерера или парсера MessagePack
+завершается ошибкой ImproperlyConfigured.
+"""
+import itertools
+import math
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+
+def require(module, name):
+    """Проверяет, что установлена библиотека, без которой класс не работает."""
+    if module is None:
+        raise ImproperlyConfigured(
+            f"Не установлен {name}: установите зависимости "
+            "из requirements.txt."
+        )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Рендерер JSON на orjson с откатом на стандартный json."""
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.compact
+            and self.strict
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if not self.use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            content = None
+        # orjson кодирует NaN и бесконечности как null, а JSONRenderer
+        # отказывается их кодировать.
+        if content is None or (b"null" in content and has_non_finite(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+    def iter_render(
+        self, chunks, accepted_media_type=None, renderer_context=None
+    ):
+        """
+        Кодирует список, заданный частями, так же, как render кодирует
+        его целиком. Каждая часть кодируется отдельно, поэтому в памяти
+        держится одна часть. Ответ с отступами собирается целиком.
+        """
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            yield self.render(
+                list(itertools.chain.from_iterable(chunks)),
+                accepted_media_type,
+                renderer_context,
+            )
+            return
+        separator = b"["
+        for chunk in chunks:
+            if chunk:
+                content = self.render(
+                    chunk, accepted_media_type, renderer_context
+                )
+                yield separator + content[1:-1]
+                separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Рендерер MessagePack. Типы, которых нет в MessagePack (Decimal,
+    даты, ленивые строки), приводятся так же, как в JSON.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder_class = JSONEncoder
+
+    def __init__(self):
+        require(msgpack, "msgpack")
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self.encoder_class().default)
+
+
+def has_non_finite(data):
+    """Проверяет, есть ли в данных NaN или бесконечность."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(has_non_finite, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(has_non_finite, data))
+    return False
@@ -12,11 +12,36 @@ from reviews.models import (
     Comment,
     CustomUser,
     Genre,
+    LeaderboardEntry,
     Review,
     Title,
 )
 
 
+class SparseFieldsSerializerMixin:
+    """
+    Выбор полей ответа. В контексте передаются fields - имена полей
+    ответа (None - все поля) и expand - поля из expandable_fields,
+    которые вместо краткого представления встраиваются объектом.
+    Невыбранные поля удаляются до сериализации и не вычисляются.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields is not None:
+            for name in list(self.fields):
+                if name not in fields:
+                    del self.fields[name]
+        for name in self.context.get("expand", ()):
+            if name in self.fields:
+                self.fields[name] = self.expandable_fields[name](
+                    read_only=True
+                )
+
+
 class AuthSerializer(serializers.ModelSerializer):
     """Сериализатор для системы регистрации и аутентификации."""
 
@@ -96,7 +121,21 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ["name", "slug"]
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class AuthorSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для автора отзыва или комментария. Отзывы
+    и комментарии читают и анонимные пользователи, поэтому в него
+    входят только публичные поля профиля.
+    """
+
+    class Meta:
+        model = CustomUser
+        fields = ("username",)
+
+
+class TitleGetSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для произведения."""
 
     category = CategorySerializer()
@@ -104,7 +143,7 @@ class TitleGetSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField()
 
     class Meta:
-        fields = "__all__"
+        exclude = ("score_sum", "review_count")
         model = Title
         read_only_fields = ["__all__"]
 
@@ -127,12 +166,28 @@ class TitlePostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = "__all__"
+        exclude = ("score_sum", "review_count", "rating")
+
 
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Сериализатор для записи таблицы лучших произведений."""
 
-class CommentSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="title_id")
+    name = serializers.CharField(source="title.name")
+    year = serializers.IntegerField(source="title.year")
+
+    class Meta:
+        fields = ["id", "name", "year", "rating", "review_count"]
+        model = LeaderboardEntry
+
+
+class CommentSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для комментария."""
 
+    expandable_fields = {"author": AuthorSerializer}
+
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         read_only=True,
@@ -144,9 +199,13 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для отзыва."""
 
+    expandable_fields = {"author": AuthorSerializer}
+
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         read_only=True,
@@ -163,10 +222,9 @@ class ReviewSerializer(serializers.ModelSerializer):
         if self.context["request"].method in ("PUT", "PATCH"):
             return data
 
-        title_id = self.context["view"].kwargs.get("title_id")
-        title = get_object_or_404(Title, pk=title_id)
+        title = self.context["title"]
         author = self.context["request"].user
-        if author.reviews.filter(title=title).exists():
+        if Review.objects.filter(author_id=author.pk, title=title).exists():
             raise serializers.ValidationError(
                 (
                     f"Отзыв к произведению {title.name} "
@@ -178,3 +236,13 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ["id", "text", "author", "score", "pub_date"]
         model = Review
+
+
+class ReviewBatchItemSerializer(serializers.Serializer):
+    """Сериализатор отзыва в пакетной загрузке."""
+
+    title = serializers.IntegerField(min_value=1)
+    text = serializers.CharField()
+    score = serializers.IntegerField(
+        min_value=MIN_VALUE_SCORE, max_value=MAX_VALUE_SCORE
+    )
@@ -0,0 +1,216 @@
+"""
+Сброс кэша ответов API и claims токенов при изменении данных.
+
+Каждое изменение модели сопоставляется с версионными пространствами
+имён кэша (см. api.cache), поэтому сброс стоит O(1) и не требует
+перебора ключей. Версии увеличиваются после фиксации транзакции:
+
+- категория: category, category:<slug>;
+- жанр: genre, genre:<slug>;
+- произведение и его жанры: titles, titles:<pk>;
+- отзыв: titles, titles:<title_id>, reviews:<title_id>, review:<pk>;
+- комментарий: comments:<review_id>, comment:<pk>;
+- пользователь: users;
+- массовая загрузка данных: all.
+
+Удаление произведения или отзыва сбрасывает и их вложенные списки
+(reviews:<pk>, comments:<pk>), даже если те пусты. Изменение имени
+пользователя сбрасывает отзывы и комментарии, в которых он автор;
+остальные сохранения пользователя (например, регистрация) кэш отзывов
+и комментариев не затрагивают.
+
+Изменение роли, is_staff или is_active пользователя и его удаление
+помечают claims его токенов устаревшими (см. api.authentication),
+массовая запись пользователей - claims токенов всех пользователей.
+"""
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+)
+from django.dispatch import receiver
+
+from api.authentication import denylist
+from api.cache import GLOBAL_NAMESPACE, invalidate
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+)
+from reviews.signals import data_loaded
+
+# Поля пользователя, от которых зависят claims его токенов.
+CLAIM_FIELDS = ("role", "is_staff", "is_active")
+# Поля пользователя, которые выводятся в отзывах и комментариях.
+AUTHOR_FIELDS = ("username",)
+# Вложенные списки, которые исчезают вместе с объектом.
+CHILD_NAMESPACES = {Title: "reviews", Review: "comments"}
+
+
+def get_namespaces(instance):
+    """Возвращает пространства имён, которые затрагивает запись объекта."""
+    if isinstance(instance, Category):
+        return ("category", f"category:{instance.slug}")
+    if isinstance(instance, Genre):
+        return ("genre", f"genre:{instance.slug}")
+    if isinstance(instance, Title):
+        return ("titles", f"titles:{instance.pk}")
+    if isinstance(instance, GenreTitle):
+        return ("titles", f"titles:{instance.title_id}")
+    if isinstance(instance, Review):
+        return (
+            "titles",
+            f"titles:{instance.title_id}",
+            f"reviews:{instance.title_id}",
+            f"review:{instance.pk}",
+        )
+    if isinstance(instance, Comment):
+        return (f"comments:{instance.review_id}", f"comment:{instance.pk}")
+    if isinstance(instance, CustomUser):
+        return ("users",)
+    return ()
+
+
+def invalidate_on_commit(*namespaces):
+    """
+    Сбрасывает кэш после фиксации текущей транзакции, иначе параллельный
+    запрос успел бы сохранить под новой версией ещё старый ответ.
+    """
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def invalidate_on_write(sender, instance, raw=False, **kwargs):
+    """Сбрасывает кэш при сохранении и удалении объекта."""
+    if not raw:
+        invalidate_on_commit(*get_namespaces(instance))
+
+
+for model in (Category, Genre, Title, GenreTitle, Review, Comment, CustomUser):
+    post_save.connect(invalidate_on_write, sender=model)
+    post_delete.connect(invalidate_on_write, sender=model)
+
+
+def invalidate_children_on_delete(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш вложенного списка удалённого объекта: пустой список
+    не сбрасывается удалением дочерних объектов и иначе отдавался бы
+    из кэша вместо 404.
+    """
+    invalidate_on_commit(f"{CHILD_NAMESPACES[sender]}:{instance.pk}")
+
+
+for model in CHILD_NAMESPACES:
+    post_delete.connect(invalidate_children_on_delete, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_on_genre_change(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    """Сбрасывает кэш произведений при изменении их жанров."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_on_commit(*get_namespaces(instance))
+    elif pk_set is not None:
+        invalidate_on_commit("titles", *(f"titles:{pk}" for pk in pk_set))
+    else:
+        invalidate_on_commit("titles", "genre")
+
+
+@receiver(data_loaded)
+def invalidate_on_data_loaded(sender, **kwargs):
+    """Сбрасывает весь кэш после массовой загрузки в обход сигналов."""
+    invalidate_on_commit(GLOBAL_NAMESPACE)
+
+
+def get_loaded_values(instance, names):
+    """Возвращает загруженные значения полей без обращения к базе."""
+    return {name: instance.__dict__.get(name, DEFERRED) for name in names}
+
+
+def update_saved_values(instance, names, update_fields=None):
+    """
+    Сравнивает записанные при сохранении поля из names с запомненными
+    значениями, запоминает новые и возвращает, изменились ли они.
+    """
+    saved = instance.__dict__.setdefault("_saved_values", {})
+    current = get_loaded_values(
+        instance,
+        [
+            name
+            for name in names
+            if update_fields is None or name in update_fields
+        ],
+    )
+    changed = any(saved.get(name) != value for name, value in current.items())
+    saved.update(current)
+    return changed
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_user_values(sender, instance, **kwargs):
+    """Запоминает значения полей claims и автора для сравнения."""
+    instance._saved_values = get_loaded_values(
+        instance, (*CLAIM_FIELDS, *AUTHOR_FIELDS)
+    )
+
+
+def get_author_namespaces(user_id):
+    """Возвращает пространства имён отзывов и комментариев автора."""
+    namespaces = set()
+    for pk, title_id in Review.objects.filter(author_id=user_id).values_list(
+        "pk", "title_id"
+    ):
+        namespaces.update((f"review:{pk}", f"reviews:{title_id}"))
+    for pk, review_id in Comment.objects.filter(
+        author_id=user_id
+    ).values_list("pk", "review_id"):
+        namespaces.update((f"comment:{pk}", f"comments:{review_id}"))
+    return namespaces
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_author_content(sender, instance, created=False, raw=False,
+                              update_fields=None, **kwargs):
+    """Сбрасывает кэш отзывов и комментариев при смене имени автора."""
+    changed = update_saved_values(instance, AUTHOR_FIELDS, update_fields)
+    if changed and not (raw or created):
+        invalidate_on_commit(*get_author_namespaces(instance.pk))
+
+
+@receiver(post_save, sender=CustomUser)
+def mark_user_claims_stale(sender, instance, created=False, raw=False,
+                           update_fields=None, **kwargs):
+    """
+    После изменения роли или признаков пользователя его права
+    проверяются по базе данных, пока не истекут выданные ранее токены.
+    Сохранения, не меняющие эти поля (например, при повторной
+    регистрации), отметок не ставят.
+    """
+    changed = update_saved_values(instance, CLAIM_FIELDS, update_fields)
+    if changed and not (raw or created):
+        denylist.mark_user_changed(instance.pk)
+
+
+@receiver(data_loaded)
+def mark_loaded_users_claims_stale(sender, models=(), **kwargs):
+    """
+    Массовая запись пользователей (например, importcsv --upsert)
+    не отправляет post_save, поэтому устаревшими считаются claims
+    токенов всех пользователей.
+    """
+    if CustomUser in models:
+        denylist.mark_all_changed()
+
+
+@receiver(post_delete, sender=CustomUser)
+def mark_deleted_user_claims_stale(sender, instance, **kwargs):
+    """Токены удалённого пользователя проверяются по базе данных."""
+    denylist.mark_user_changed(instance.pk)
@@ -6,6 +6,8 @@ from api.views import (
     CommentViewSet,
     CustomUserViewSet,
     GenreViewSet,
+    Logout,
+    ReviewBatchView,
     ReviewViewSet,
     SignUp,
     TitleViewSet,
@@ -34,10 +36,12 @@ router.register(
 url_auth = [
     path("signup/", SignUp.as_view(), name="signup"),
     path("token/", Token.as_view(), name="token"),
+    path("logout/", Logout.as_view(), name="logout"),
 ]
 
 urlpatterns = [
     path("v1/users/me/", UsersMeView.as_view(), name="users_me"),
     path("v1/auth/", include(url_auth)),
+    path("v1/reviews/batch/", ReviewBatchView.as_view(), name="reviews_batch"),
     path("v1/", include(router.urls)),
 ]
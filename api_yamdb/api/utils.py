@@ -1,22 +1,32 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.authentication import get_user_claims
+from api.mail import get_email_queue
+
 
 def send_code_by_mail(email, random_code):
-    """Функция отправляет код на электронную почту."""
-    send_mail(
-        subject="Your confirmation code",
-        message=f"{random_code} - confirmation code",
-        from_email=settings.USER_EMAIL,
-        recipient_list=[email],
-        fail_silently=False,
+    """Функция ставит письмо с кодом в очередь на отправку."""
+    get_email_queue().enqueue(
+        EmailMessage(
+            subject="Your confirmation code",
+            body=f"{random_code} - confirmation code",
+            from_email=settings.USER_EMAIL,
+            to=[email],
+        )
     )
 
 
 def get_tokens_for_user(user):
-    """Функция создает токен для пользователя."""
+    """
+    Функция создает токен для пользователя. Роль и признаки
+    администратора передаются в claims токена, чтобы проверять права
+    без загрузки пользователя из базы (см. api.authentication).
+    """
     refresh = RefreshToken.for_user(user)
+    for claim, value in get_user_claims(user).items():
+        refresh[claim] = value
 
     return {
         "token": str(refresh.access_token),
@@ -1,16 +1,35 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import action
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from rest_framework.views import APIView
 
-from reviews.models import Category, CustomUser, Genre, Review, Title
-from api.filters import TitleFilter
+from reviews import leaderboards
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    LeaderboardEntry,
+    Review,
+    Title,
+)
+from api.authentication import denylist
+from api.cache import ResponseCacheMixin, get_lookup_value, invalidate
+from api.fastpath import FastListMixin, TitleValuesMapper, ValuesMapper
+from api.filters import StableOrderingFilter, TitleFilter
+from api.metrics import QueryMetricsMixin
+from api.pagination import FeedPagination
 from api.permissions import (
     IsAdminObjectReadOnlyPermission,
     IsAdminOnlyPermission,
@@ -23,6 +42,8 @@ from api.serializers import (
     CommentSerializer,
     CustomUserSerializer,
     GenreSerializer,
+    LeaderboardEntrySerializer,
+    ReviewBatchItemSerializer,
     ReviewSerializer,
     TitleGetSerializer,
     TitlePostSerializer,
@@ -30,8 +51,12 @@ from api.serializers import (
 )
 from api.utils import get_tokens_for_user, send_code_by_mail
 
+REVIEW_EXISTS = "Вы уже оставляли отзыв к этому произведению!"
+
 
 class MixinsViewSet(
+    QueryMetricsMixin,
+    FastListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -46,6 +71,136 @@ class MixinsViewSet(
     http_method_names = ["get", "post", "patch", "delete"]
 
 
+class LeaderboardMixin:
+    """
+    Действие top: лучшие произведения жанра или категории из заранее
+    посчитанной таблицы (см. reviews.leaderboards).
+    """
+
+    leaderboard_kind = None
+
+    @action(detail=True, methods=["get"])
+    def top(self, request, slug=None):
+        """Лучшие произведения группы по рейтингу."""
+        return self.get_cached_response(self.get_top, request, slug=slug)
+
+    def get_top(self, request, slug=None):
+        group = get_object_or_404(self.get_queryset(), slug=slug)
+        entries = LeaderboardEntry.objects.filter(
+            kind=self.leaderboard_kind, group_id=group.pk
+        ).select_related("title")
+        serializer = LeaderboardEntrySerializer(entries, many=True)
+        return Response(serializer.data)
+
+    def get_cache_namespaces(self):
+        if self.action == "top":
+            return (f"{self.basename}:{self.kwargs['slug']}", "titles")
+        return super().get_cache_namespaces()
+
+
+class SparseFieldsMixin:
+    """Миксин для параметров fields и expand без загрузки лишних полей."""
+
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    deferrable_fields = ()
+
+    def get_query_list(self, name):
+        value = self.request.query_params.get(name, "")
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    def get_sparse_fields(self):
+        """Возвращает пару (поля ответа или None, встраиваемые поля)."""
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+        fields, expand = [], []
+        if self.request.method in permissions.SAFE_METHODS:
+            fields = self.get_query_list("fields")
+            expand = self.get_query_list("expand")
+        serializer_class = self.get_serializer_class()
+        errors = {}
+        if fields:
+            unknown = set(fields) - set(serializer_class().fields)
+            if unknown:
+                errors["fields"] = [
+                    f"Неизвестные поля: {', '.join(sorted(unknown))}."
+                ]
+        unknown = set(expand) - set(
+            getattr(serializer_class, "expandable_fields", {})
+        )
+        if unknown:
+            errors["expand"] = [
+                f"Эти поля нельзя встроить: {', '.join(sorted(unknown))}."
+            ]
+        if errors:
+            raise ValidationError(errors)
+        self._sparse_fields = (fields or None, expand)
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, _ = self.get_sparse_fields()
+
+        def requested(name):
+            return fields is None or name in fields
+
+        select = [
+            lookup
+            for name, lookup in self.select_related_fields.items()
+            if requested(name)
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        prefetch = [
+            lookup
+            for name, lookup in self.prefetch_related_fields.items()
+            if requested(name)
+        ]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        deferred = [
+            name for name in self.deferrable_fields if not requested(name)
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"], context["expand"] = self.get_sparse_fields()
+        return context
+
+
+class NestedResourceMixin:
+    """
+    Родительский объект вложенного ресурса (произведение для отзывов,
+    отзыв для комментариев) загружается один раз за запрос и передаётся
+    сериализатору в контексте под именем parent_context_name.
+    """
+
+    parent_queryset = None
+    # Поле родительской модели -> именованный параметр URL.
+    parent_lookups = {}
+    parent_context_name = None
+
+    def get_parent(self):
+        """Получает родительский объект, при первом вызове - из базы."""
+        if not hasattr(self, "_parent"):
+            self._parent = get_object_or_404(
+                self.parent_queryset.all(),
+                **{
+                    field: self.kwargs.get(kwarg)
+                    for field, kwarg in self.parent_lookups.items()
+                },
+            )
+        return self._parent
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[self.parent_context_name] = self.get_parent()
+        return context
+
+
 class SignUp(APIView):
     """APIView для регистрации нового пользователя."""
 
@@ -94,7 +249,18 @@ class Token(APIView):
         return Response(token)
 
 
-class CustomUserViewSet(MixinsViewSet):
+class Logout(APIView):
+    """APIView для отзыва токена, с которым пришёл запрос."""
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """Отзывает текущий токен."""
+        denylist.revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CustomUserViewSet(ResponseCacheMixin, MixinsViewSet):
     """Вьюсет для просмотра администратором пользователя."""
 
     filter_backends = (filters.SearchFilter,)
@@ -104,17 +270,26 @@ class CustomUserViewSet(MixinsViewSet):
     search_fields = ("username",)
     serializer_class = CustomUserSerializer
 
+    def get_cache_namespaces(self):
+        return ("users",)
+
 
-class UsersMeView(APIView):
+class UsersMeView(ResponseCacheMixin, APIView):
     """APIView для просмотра или редактирования собственного профиля."""
 
     permission_classes = (permissions.IsAuthenticated,)
 
     def get(self, request):
         """Получает определенный объект пользователя."""
+        return self.get_cached_response(self.get_profile, request)
+
+    def get_profile(self, request):
         serializer = CustomUserSerializer(request.user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def get_cache_namespaces(self):
+        return ("users",)
+
     def patch(self, request):
         """Редактирует определенный объект пользователя."""
         serializer = CustomUserSerializer(
@@ -125,31 +300,41 @@ class UsersMeView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(MixinsViewSet):
+class CategoryViewSet(LeaderboardMixin, ResponseCacheMixin, MixinsViewSet):
     """Вьюсет для просмотра и редактирования категории."""
 
     http_method_names = ["get", "post", "delete"]
+    leaderboard_kind = LeaderboardEntry.Kinds.CATEGORY
     filter_backends = (filters.SearchFilter,)
     lookup_field = "slug"
     permission_classes = (IsAdminObjectReadOnlyPermission,)
     queryset = Category.objects.all()
     search_fields = ("name",)
     serializer_class = CategorySerializer
+    values_mapper = ValuesMapper(CategorySerializer.Meta.fields)
 
     def retrieve(self, request, *args, **kwargs):
         """Запрещает просмотр определённой категории."""
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(
+    LeaderboardMixin,
+    ResponseCacheMixin,
+    QueryMetricsMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет для просмотра и редактирования жанра."""
 
     http_method_names = ["get", "post", "delete"]
+    leaderboard_kind = LeaderboardEntry.Kinds.GENRE
     filter_backends = (filters.SearchFilter,)
     lookup_field = "slug"
     permission_classes = (IsAdminObjectReadOnlyPermission,)
     search_fields = ("name",)
     serializer_class = GenreSerializer
+    values_mapper = ValuesMapper(GenreSerializer.Meta.fields)
     queryset = Genre.objects.all()
 
     def retrieve(self, request, *args, **kwargs):
@@ -157,13 +342,19 @@ class GenreViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class TitleViewSet(MixinsViewSet):
+class TitleViewSet(SparseFieldsMixin, ResponseCacheMixin, MixinsViewSet):
     """Вьюсет для просмотра и редактирования произведения."""
 
+    cache_dependencies = ("category", "genre")
     filterset_class = TitleFilter
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    ordering_fields = ("rating", "review_count", "year", "name")
     permission_classes = (IsAdminOrReadOnlyPermission,)
-    queryset = Title.objects.annotate(rating=Avg("reviews__score"))
+    queryset = Title.objects.all()
+    select_related_fields = {"category": "category"}
+    prefetch_related_fields = {"genre": "genre"}
+    deferrable_fields = ("description",)
+    values_mapper = TitleValuesMapper()
 
     def get_serializer_class(self):
         """Определяет класс сериализатора в зависимости от метода."""
@@ -171,57 +362,240 @@ class TitleViewSet(MixinsViewSet):
             return TitleGetSerializer
         return TitlePostSerializer
 
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        Количество произведений по жанрам, категориям и годам
+        для выборки с теми же фильтрами, что и список.
+        """
+        return self.get_cached_response(self.get_facets, request)
+
+    def get_facets(self, request):
+        counts = self.filter_queryset(self.get_queryset()).facet_counts()
+        return Response(
+            {
+                "genre": [
+                    {"slug": slug, "name": name, "count": count}
+                    for slug, name, count in counts["genre"]
+                ],
+                "category": [
+                    {"slug": slug, "name": name, "count": count}
+                    for slug, name, count in counts["category"]
+                ],
+                "year": [
+                    {"year": int(year), "count": count}
+                    for year, _, count in counts["year"]
+                ],
+            }
+        )
+
 
-class CommentViewSet(MixinsViewSet):
+class CommentViewSet(
+    SparseFieldsMixin, NestedResourceMixin, ResponseCacheMixin, MixinsViewSet
+):
     """Вьюсет для просмотра и редактирования комментария."""
 
-    pagination_class = PageNumberPagination
+    pagination_class = FeedPagination
     permission_classes = (
         IsAuthenticatedOrReadOnly,
         RolesPermission,
     )
     serializer_class = CommentSerializer
+    parent_queryset = Review.objects.select_related("title")
+    parent_lookups = {"pk": "review_id", "title_id": "title_id"}
+    parent_context_name = "review"
+    select_related_fields = {"author": "author"}
+    deferrable_fields = ("text",)
 
     def get_review(self):
         """Получает конкретный отзыв."""
-        review_id = self.kwargs.get("review_id")
-        title_id = self.kwargs.get("title_id")
-        return get_object_or_404(Review, pk=review_id, title_id=title_id)
+        return self.get_parent()
 
     def get_queryset(self):
         """Возвращает queryset c комментариями для конкретного отзыва."""
         return self.get_review().comments.all()
 
+    def get_cache_namespaces(self):
+        if self.action == "retrieve":
+            pk = get_lookup_value(Comment, "pk", self.kwargs["pk"])
+            return (f"comment:{pk}",)
+        review_id = get_lookup_value(Review, "pk", self.kwargs["review_id"])
+        return (f"comments:{review_id}",)
+
     def perform_create(self, serializer):
         """
         Создает комментарий для конкретного отзыва, где автор -
         текущий пользователь.
         """
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.pk, review=self.get_review()
+        )
 
 
-class ReviewViewSet(MixinsViewSet):
+class ReviewViewSet(
+    SparseFieldsMixin, NestedResourceMixin, ResponseCacheMixin, MixinsViewSet
+):
     """Вьюсет для просмотра и редактирования отзыва."""
 
-    pagination_class = PageNumberPagination
+    pagination_class = FeedPagination
     permission_classes = (
         IsAuthenticatedOrReadOnly,
         RolesPermission,
     )
     serializer_class = ReviewSerializer
+    parent_queryset = Title.objects.all()
+    parent_lookups = {"pk": "title_id"}
+    parent_context_name = "title"
+    select_related_fields = {"author": "author"}
+    deferrable_fields = ("text",)
 
     def get_title(self):
         """Получает конкретное произведение."""
-        title_id = self.kwargs.get("title_id")
-        return get_object_or_404(Title, pk=title_id)
+        return self.get_parent()
 
     def get_queryset(self):
         """Возвращает queryset c отзывами для конкретного произведения."""
         return self.get_title().reviews.all()
 
+    def get_cache_namespaces(self):
+        if self.action == "retrieve":
+            pk = get_lookup_value(Review, "pk", self.kwargs["pk"])
+            return (f"review:{pk}",)
+        title_id = get_lookup_value(Title, "pk", self.kwargs["title_id"])
+        return (f"reviews:{title_id}",)
+
     def perform_create(self, serializer):
         """
         Создает отзыв для конкретного произведения, где автор -
         текущий пользователь.
         """
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(
+            author_id=self.request.user.pk, title=self.get_title()
+        )
+
+
+class ReviewBatchView(APIView):
+    """APIView для пакетной загрузки отзывов текущего пользователя."""
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        items = request.data
+        max_size = settings.REVIEW_BATCH_MAX_SIZE
+        if not isinstance(items, list) or not 0 < len(items) <= max_size:
+            raise ValidationError(
+                f"Передайте список от 1 до {max_size} отзывов."
+            )
+        results = []
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = ReviewBatchItemSerializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                results.append(self.get_error(index, serializer.errors))
+        title_ids = {data["title"] for data in valid.values()}
+        existing_titles = set(
+            Title.objects.filter(pk__in=title_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        reviewed = set(
+            Review.objects.filter(
+                author_id=request.user.pk, title_id__in=existing_titles
+            ).values_list("title_id", flat=True)
+        )
+        accepted = {}
+        for index, data in valid.items():
+            title_id = data["title"]
+            if title_id not in existing_titles:
+                error = "Произведение не найдено."
+            elif title_id in reviewed:
+                error = REVIEW_EXISTS
+            elif title_id in accepted.values():
+                error = "Отзыв к этому произведению уже есть в пакете."
+            else:
+                accepted[index] = title_id
+                continue
+            results.append(self.get_error(index, {"title": [error]}))
+        if accepted:
+            results.extend(self.save_reviews(request.user, valid, accepted))
+        results.sort(key=lambda result: result["index"])
+        return Response(
+            results,
+            status=(
+                status.HTTP_201_CREATED
+                if all(
+                    result["status"] == status.HTTP_201_CREATED
+                    for result in results
+                )
+                else status.HTTP_207_MULTI_STATUS
+            ),
+        )
+
+    def save_reviews(self, user, valid, accepted):
+        """Сохраняет принятые отзывы и возвращает их результаты."""
+        conflicts = self.create_reviews(user, valid, accepted)
+        review_ids = dict(
+            Review.objects.filter(
+                author_id=user.pk, title_id__in=accepted.values()
+            ).values_list("title_id", "pk")
+        )
+        for index, title_id in accepted.items():
+            if title_id in conflicts:
+                yield self.get_error(
+                    index, {"title": [REVIEW_EXISTS]}, status.HTTP_409_CONFLICT
+                )
+            else:
+                yield {
+                    "index": index,
+                    "status": status.HTTP_201_CREATED,
+                    "id": review_ids[title_id],
+                    "title": title_id,
+                }
+
+    @staticmethod
+    def get_error(index, errors, code=status.HTTP_400_BAD_REQUEST):
+        return {
+            "index": index,
+            "status": code,
+            "errors": errors,
+        }
+
+    @staticmethod
+    def create_reviews(user, valid, accepted):
+        """Сохраняет отзывы и возвращает произведения с конфликтами."""
+        title_ids = set(accepted.values())
+        conflicts = set()
+        with transaction.atomic():
+            while True:
+                try:
+                    with transaction.atomic():
+                        Review.objects.bulk_create(
+                            Review(
+                                author_id=user.pk,
+                                title_id=title_id,
+                                text=valid[index]["text"],
+                                score=valid[index]["score"],
+                            )
+                            for index, title_id in accepted.items()
+                            if title_id not in conflicts
+                        )
+                    break
+                except IntegrityError:
+                    reviewed = set(
+                        Review.objects.filter(
+                            author_id=user.pk, title_id__in=title_ids
+                        ).values_list("title_id", flat=True)
+                    )
+                    if reviewed <= conflicts:
+                        raise
+                    conflicts |= reviewed
+            Title.objects.filter(pk__in=title_ids).refresh_rating()
+            leaderboards.schedule_update_many(title_ids)
+        invalidate(
+            "titles",
+            *(f"titles:{title_id}" for title_id in title_ids),
+            *(f"reviews:{title_id}" for title_id in title_ids),
+        )
+        return conflicts
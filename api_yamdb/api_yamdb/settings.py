@@ -23,11 +23,12 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework.authtoken",
     "django_filters",
-    "api.apps.ApiConfig",
     "reviews.apps.ReviewsConfig",
+    "api.apps.ApiConfig",
 ]
 
 MIDDLEWARE = [
+    "api.metrics.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -70,6 +71,18 @@ DATABASES = {
 
 AUTH_USER_MODEL = "reviews.CustomUser"
 
+# Cache
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+RESPONSE_CACHE_ALIAS = "default"
+
+RESPONSE_CACHE_TIMEOUT = 60
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -112,7 +125,19 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.StatelessJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        # MessagePack (Accept: application/msgpack) для внутренних сервисов.
+        "api.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "api.parsers.MessagePackParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
@@ -123,10 +148,64 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Лимиты запросов к базе данных по маршрутам и реакция на их
+# превышение: "log" - предупреждение в лог, "raise" - исключение
+# QueryBudgetExceeded (см. api.metrics).
+QUERY_BUDGETS = {
+    "GET api:category-list": 3,
+    "GET api:genre-list": 3,
+    "GET api:titles-list": 4,
+    "GET api:titles-detail": 3,
+    "GET api:titles-facets": 2,
+    "GET api:category-top": 3,
+    "GET api:genre-top": 3,
+    "GET api:reviews-list": 4,
+    "GET api:reviews-detail": 3,
+    "GET api:comments-list": 4,
+    "GET api:comments-detail": 3,
+}
+
+QUERY_BUDGET_ACTION = "log"
+
+# Отдавать метрики запроса в заголовках Server-Timing и X-Query-Count
+# при выключенном DEBUG.
+QUERY_METRICS_HEADERS = False
+
+# Списки категорий, жанров и произведений строятся из values_list
+# без сериализаторов (см. api.fastpath).
+FAST_READ_PATH = True
+
+# Списки без пагинации длиннее стольких строк отдаются потоком
+# и кодируются частями того же размера (см. api.fastpath);
+# None выключает потоковую отдачу.
+JSON_STREAMING_CHUNK_SIZE = 1000
+
+# Наибольший размер страницы лент отзывов и комментариев, который можно
+# запросить параметром page_size.
+FEED_MAX_PAGE_SIZE = 100
+
+# Максимальное количество отзывов в одном запросе к /api/v1/reviews/batch/.
+REVIEW_BATCH_MAX_SIZE = 1000
+
+# Количество произведений в таблицах лучших по жанрам и категориям.
+LEADERBOARD_SIZE = 10
+
+# Размер списка отозванных токенов и изменённых пользователей
+# в памяти процесса (см. api.authentication).
+JWT_DENYLIST_SIZE = 10000
+
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
 EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
 
+EMAIL_QUEUE = {
+    "BACKEND": "api.mail.ThreadPoolEmailQueue",
+    "WORKERS": 2,
+    "BATCH_SIZE": 50,
+    "MAX_RETRIES": 5,
+    "RETRY_DELAY": 1,
+}
+
 DOMAIN_NAME = "yamdb.com"
 
 USER_EMAIL = f"from@{DOMAIN_NAME}"
@@ -0,0 +1,243 @@
+"""
+Таблицы лучших произведений жанров и категорий.
+
+Для каждой группы в LeaderboardEntry хранится не больше
+LEADERBOARD_SIZE произведений с наибольшим рейтингом (при равенстве -
+с большим id), поэтому чтение таблицы стоит O(K). Таблицы обновляются
+инкрементально после изменения рейтинга, категории или жанров
+произведения (см. reviews.signals) и полностью перестраиваются командой
+rebuildleaderboards и после массовой загрузки данных.
+
+Обновления одной группы из разных транзакций упорядочиваются блокировкой
+строки жанра или категории (select_for_update). Если блокировка
+недоступна (SQLite) и таблица всё же изменилась одновременно,
+конфликт уникальности или переполнение таблиц исправляются
+их пересборкой.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+
+from reviews.models import Category, Genre, GenreTitle, LeaderboardEntry, Title
+
+GENRE = LeaderboardEntry.Kinds.GENRE.value
+CATEGORY = LeaderboardEntry.Kinds.CATEGORY.value
+
+
+def get_size():
+    return settings.LEADERBOARD_SIZE
+
+
+def get_top_titles(kind, group_id, size):
+    """Выбирает лучшие произведения группы по хранимому рейтингу."""
+    lookup = "category_id" if kind == CATEGORY else "genre"
+    return (
+        Title.objects.filter(rating__isnull=False, **{lookup: group_id})
+        .order_by("-rating", "-id")
+        .values_list("pk", "rating", "review_count")[:size]
+    )
+
+
+def rebuild_group(kind, group_id):
+    """Пересобирает таблицу одной группы."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(kind=kind, group_id=group_id).delete()
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(
+                kind=kind,
+                group_id=group_id,
+                title_id=title_id,
+                rating=rating,
+                review_count=review_count,
+            )
+            for title_id, rating, review_count in get_top_titles(
+                kind, group_id, get_size()
+            )
+        )
+
+
+def rebuild():
+    """Пересобирает таблицы всех жанров и категорий."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        for kind, model in ((CATEGORY, Category), (GENRE, Genre)):
+            for group_id in model.objects.values_list("pk", flat=True):
+                rebuild_group(kind, group_id)
+
+
+def get_condition(groups):
+    """Возвращает условие на записи таблиц перечисленных групп."""
+    condition = Q(pk__in=[])
+    for kind in (CATEGORY, GENRE):
+        group_ids = [group_id for key, group_id in groups if key == kind]
+        if group_ids:
+            condition |= Q(kind=kind, group_id__in=group_ids)
+    return condition
+
+
+def lock_groups(groups):
+    """
+    Блокирует до конца транзакции строки жанров и категорий групп,
+    чтобы их таблицы не обновлялись одновременно.
+    """
+    for kind, model in ((CATEGORY, Category), (GENRE, Genre)):
+        group_ids = sorted(group_id for key, group_id in groups if key == kind)
+        if group_ids:
+            list(
+                model.objects.select_for_update()
+                .filter(pk__in=group_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+
+
+def trim_boards(groups):
+    """Пересобирает таблицы групп, переполненные одновременными записями."""
+    overfull = (
+        LeaderboardEntry.objects.filter(get_condition(groups))
+        .order_by()
+        .values_list("kind", "group_id")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=get_size())
+    )
+    for kind, group_id, _ in overfull:
+        rebuild_group(kind, group_id)
+
+
+def get_board(group):
+    kind, group_id = group
+    return list(LeaderboardEntry.objects.filter(kind=kind, group_id=group_id))
+
+
+def update_titles(title_ids):
+    """
+    Обновляет таблицы групп произведений после изменения их рейтинга,
+    категории или жанров. Произведения, их жанры и затронутые таблицы
+    читаются тремя запросами на весь набор.
+
+    Таблица группы пересобирается целиком, только если произведение
+    покидает заполненную таблицу и его место может занять произведение,
+    которого в таблице нет, или если таблицу одновременно изменила
+    другая транзакция.
+    """
+    with transaction.atomic():
+        titles = {
+            title["pk"]: title
+            for title in Title.objects.filter(pk__in=title_ids).values(
+                "pk", "rating", "review_count", "category_id"
+            )
+        }
+        groups = {
+            pk: {(CATEGORY, title["category_id"])}
+            if title["category_id"] is not None
+            else set()
+            for pk, title in titles.items()
+        }
+        for title_id, genre_id in GenreTitle.objects.filter(
+            title_id__in=titles
+        ).values_list("title_id", "genre_id"):
+            groups[title_id].add((GENRE, genre_id))
+        current = set().union(*groups.values())
+        lock_groups(current)
+        boards = defaultdict(list)
+        stale = set()
+        for entry in LeaderboardEntry.objects.filter(
+            Q(title_id__in=title_ids) | get_condition(current)
+        ):
+            group = (entry.kind, entry.group_id)
+            boards[group].append(entry)
+            if group not in groups.get(entry.title_id, (group,)):
+                stale.add(group)
+        lock_groups(stale - current)
+        for group in stale:
+            rebuild_group(*group)
+            boards[group] = get_board(group)
+        try:
+            with transaction.atomic():
+                for pk, title in titles.items():
+                    for group in groups[pk]:
+                        update_board(group, boards[group], title)
+        except IntegrityError:
+            for group in current:
+                rebuild_group(*group)
+        else:
+            trim_boards(current)
+
+
+def update_title(title_id):
+    """Обновляет таблицы групп одного произведения."""
+    update_titles([title_id])
+
+
+def update_board(group, board, title):
+    """
+    Применяет новый рейтинг произведения к таблице одной группы.
+    Список board обновляется вместе с базой данных.
+    """
+    size = get_size()
+    own = next(
+        (entry for entry in board if entry.title_id == title["pk"]), None
+    )
+    others = [entry for entry in board if entry is not own]
+    lowest = min(
+        ((entry.rating, entry.title_id) for entry in others),
+        default=None,
+    )
+    if title["rating"] is None:
+        if own is not None:
+            rebuild_group(*group)
+            board[:] = get_board(group)
+        return
+    key = (title["rating"], title["pk"])
+    if own is not None:
+        if len(board) < size or lowest is None or key >= lowest:
+            if (own.rating, own.review_count) != (
+                title["rating"],
+                title["review_count"],
+            ):
+                own.rating = title["rating"]
+                own.review_count = title["review_count"]
+                own.save(update_fields=("rating", "review_count"))
+        else:
+            rebuild_group(*group)
+            board[:] = get_board(group)
+        return
+    if len(board) >= size:
+        if key <= lowest:
+            return
+        LeaderboardEntry.objects.filter(
+            kind=group[0], group_id=group[1], title_id=lowest[1]
+        ).delete()
+        board[:] = [entry for entry in board if entry.title_id != lowest[1]]
+    board.append(
+        LeaderboardEntry.objects.create(
+            kind=group[0],
+            group_id=group[1],
+            title_id=title["pk"],
+            rating=title["rating"],
+            review_count=title["review_count"],
+        )
+    )
+
+
+def schedule_update(title_id):
+    """Обновляет таблицы после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: update_title(title_id))
+
+
+def schedule_update_many(title_ids):
+    """Обновляет таблицы нескольких произведений после фиксации транзакции."""
+    title_ids = list(title_ids)
+    transaction.on_commit(lambda: update_titles(title_ids))
+
+
+def schedule_rebuild(groups):
+    """Пересобирает таблицы групп после фиксации текущей транзакции."""
+
+    def rebuild_groups():
+        for group in groups:
+            rebuild_group(*group)
+
+    transaction.on_commit(rebuild_groups)
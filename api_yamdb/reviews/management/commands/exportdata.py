@@ -0,0 +1,71 @@
+import os
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from reviews.management.datafiles import (
+    FORMATS,
+    TABLES,
+    get_extension,
+    open_data_file,
+    write_rows,
+)
+
+
+DEFAULT_CHUNK_SIZE = 2000
+EXPORT_DIR = "static/export"
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает все таблицы в csv или jsonl в формате, "
+        "который читает importcsv"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=EXPORT_DIR,
+            help="Папка для выгрузки",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default="csv",
+            help="Формат файлов",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Сжимать файлы gzip",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            default=DEFAULT_CHUNK_SIZE,
+            type=int,
+            help="Количество строк, читаемых из базы за один раз",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        os.makedirs(options["path"], exist_ok=True)
+        extension = get_extension(options["format"], options["gzip"])
+        for name, model, columns in TABLES:
+            path = os.path.join(options["path"], name + extension)
+            started = time.perf_counter()
+            attnames = [
+                model._meta.get_field(column).attname for column in columns
+            ]
+            rows = (
+                model.objects.order_by("pk")
+                .values_list(*attnames)
+                .iterator(chunk_size=options["chunk_size"])
+            )
+            with open_data_file(path, "w") as file:
+                count = write_rows(file, options["format"], columns, rows)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{path}: {count} строк за {elapsed:.2f} с "
+                    f"({count / max(elapsed, 1e-9):.0f} строк/с)"
+                )
+            )
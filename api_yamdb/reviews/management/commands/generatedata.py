@@ -0,0 +1,255 @@
+import random
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.management.utils import batched, reset_sequences
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+)
+from reviews.signals import data_loaded
+
+DEFAULT_BATCH_SIZE = 2000
+# Распределение оценок: чаще ставят 7-8, реже крайние значения.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 14, 10, 6)
+PUB_DATE_SPREAD = timedelta(days=3 * 365)
+
+
+def zipf_counts(size, total, exponent, rng):
+    """
+    Распределяет total элементов по size позициям по закону Ципфа:
+    позиция ранга k получает долю, пропорциональную 1 / k ** exponent.
+    Дробные части округляются случайно, чтобы сумма в среднем
+    совпадала с total.
+    """
+    norm = sum(1 / rank**exponent for rank in range(1, size + 1))
+    for rank in range(1, size + 1):
+        expected = total / rank**exponent / norm
+        count = int(expected)
+        if rng.random() < expected - count:
+            count += 1
+        yield count
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными: отзывы по произведениям "
+        "и комментарии по отзывам распределены по закону Ципфа"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--titles", type=int, default=1000, help="Количество произведений"
+        )
+        parser.add_argument(
+            "--users", type=int, default=200, help="Количество пользователей"
+        )
+        parser.add_argument(
+            "--categories", type=int, default=10, help="Количество категорий"
+        )
+        parser.add_argument(
+            "--genres", type=int, default=20, help="Количество жанров"
+        )
+        parser.add_argument(
+            "--reviews-per-title",
+            type=float,
+            default=10,
+            help="Среднее количество отзывов на произведение",
+        )
+        parser.add_argument(
+            "--comments-per-review",
+            type=float,
+            default=2,
+            help="Среднее количество комментариев на отзыв",
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Показатель степени распределения Ципфа",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Начальное значение генератора случайных чисел",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Количество строк в одном INSERT-запросе",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.zipf = options["zipf"]
+        self.now = timezone.now()
+        with transaction.atomic():
+            self.category_ids = self.generate(
+                Category, options["categories"], self.build_category
+            )
+            self.genre_ids = self.generate(
+                Genre, options["genres"], self.build_genre
+            )
+            self.password = make_password(None)
+            self.user_ids = self.generate(
+                CustomUser, options["users"], self.build_user
+            )
+            titles = self.generate(Title, options["titles"], self.build_title)
+            self.generate_genre_titles(titles)
+            reviews = self.generate_reviews(
+                titles, round(len(titles) * options["reviews_per_title"])
+            )
+            self.generate_comments(
+                reviews, round(len(reviews) * options["comments_per_review"])
+            )
+        reset_sequences([Category, Genre, CustomUser, Title, Review])
+        Title.objects.refresh_rating()
+        data_loaded.send(
+            sender=self.__class__,
+            models=[
+                Category, Genre, CustomUser, Title, GenreTitle, Review, Comment
+            ],
+        )
+
+    def next_pk(self, model):
+        return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+    def bulk_create(self, model, objects, message):
+        """Сохраняет объекты пачками и сообщает о скорости загрузки."""
+        started = time.perf_counter()
+        rows = 0
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            rows += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{message}: {rows} строк за {elapsed:.2f} с "
+                f"({rows / max(elapsed, 1e-9):.0f} строк/с)"
+            )
+        )
+        return rows
+
+    def generate(self, model, count, build):
+        """Создаёт count объектов модели и возвращает диапазон их id."""
+        first = self.next_pk(model)
+        pks = range(first, first + count)
+        self.bulk_create(
+            model,
+            (build(pk) for pk in pks),
+            f"{model._meta.verbose_name_plural} созданы",
+        )
+        return pks
+
+    @staticmethod
+    def build_category(pk):
+        return Category(pk=pk, name=f"Категория {pk}", slug=f"category-{pk}")
+
+    @staticmethod
+    def build_genre(pk):
+        return Genre(pk=pk, name=f"Жанр {pk}", slug=f"genre-{pk}")
+
+    def build_user(self, pk):
+        return CustomUser(
+            pk=pk,
+            username=f"user-{pk}",
+            email=f"user-{pk}@example.com",
+            password=self.password,
+        )
+
+    def build_title(self, pk):
+        return Title(
+            pk=pk,
+            name=f"Произведение {pk}",
+            year=self.rng.randint(1900, self.now.year - 1),
+            description=f"Описание произведения {pk}",
+            category_id=(
+                self.rng.choice(self.category_ids)
+                if self.category_ids
+                else None
+            ),
+        )
+
+    def get_pub_date(self):
+        return self.now - PUB_DATE_SPREAD * self.rng.random()
+
+    def generate_genre_titles(self, titles):
+        """Назначает каждому произведению от одного до трёх жанров."""
+        if not self.genre_ids:
+            return
+
+        def build():
+            for title_id in titles:
+                count = min(self.rng.randint(1, 3), len(self.genre_ids))
+                for genre_id in self.rng.sample(self.genre_ids, count):
+                    yield GenreTitle(title_id=title_id, genre_id=genre_id)
+
+        self.bulk_create(GenreTitle, build(), "Жанры произведений созданы")
+
+    def generate_reviews(self, titles, total):
+        """
+        Создаёт отзывы: количество отзывов на произведение распределено
+        по закону Ципфа, популярные произведения выбираются случайно.
+        Пользователь оставляет не больше одного отзыва на произведение.
+        """
+        ranked = list(titles)
+        self.rng.shuffle(ranked)
+        first = self.next_pk(Review)
+        counts = zipf_counts(len(ranked), total, self.zipf, self.rng)
+        created = 0
+
+        def build():
+            nonlocal created
+            for title_id, count in zip(ranked, counts):
+                count = min(count, len(self.user_ids))
+                for author_id in self.rng.sample(self.user_ids, count):
+                    yield Review(
+                        pk=first + created,
+                        title_id=title_id,
+                        author_id=author_id,
+                        score=self.rng.choices(
+                            range(1, len(SCORE_WEIGHTS) + 1), SCORE_WEIGHTS
+                        )[0],
+                        text=f"Отзыв {first + created}",
+                        pub_date=self.get_pub_date(),
+                    )
+                    created += 1
+
+        self.bulk_create(Review, build(), "Отзывы созданы")
+        return range(first, first + created)
+
+    def generate_comments(self, reviews, total):
+        """
+        Создаёт комментарии: количество комментариев на отзыв
+        распределено по закону Ципфа, больше всего комментариев
+        получают отзывы на популярные произведения.
+        """
+        if not reviews or not self.user_ids:
+            return
+        counts = zipf_counts(len(reviews), total, self.zipf, self.rng)
+
+        def build():
+            for review_id, count in zip(reviews, counts):
+                for _ in range(count):
+                    yield Comment(
+                        review_id=review_id,
+                        author_id=self.rng.choice(self.user_ids),
+                        text=f"Комментарий к отзыву {review_id}",
+                        pub_date=self.get_pub_date(),
+                    )
+
+        self.bulk_create(Comment, build(), "Комментарии созданы")
@@ -1,7 +1,19 @@
-import csv
+import hashlib
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Any
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.management.datafiles import (
+    DATA_DIR,
+    TABLES,
+    find_data_file,
+    open_data_file,
+    read_rows,
+)
+from reviews.management.utils import batched, reset_sequences
 from reviews.models import (
     Category,
     Comment,
@@ -11,120 +23,269 @@ from reviews.models import (
     Review,
     Title,
 )
+from reviews.signals import data_loaded
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+MESSAGES = {
+    Category: "Категории загружены",
+    CustomUser: "Пользователи загружены",
+    Genre: "Жанры загружены",
+    Title: "Произведения загружены",
+    GenreTitle: "Таблица Genre-title загружена",
+    Review: "Отзывы загружены",
+    Comment: "Комментарии загружены",
+}
+
+
+def get_dependencies(models):
+    """
+    Строит граф зависимостей таблиц по внешним ключам моделей:
+    каждой модели сопоставляется множество моделей, на которые она ссылается.
+    """
+    return {
+        model: {
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.is_relation
+            and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+
+
+def to_python(field, value):
+    """
+    Приводит значение из файла к типу поля модели. Пустое значение
+    поля со значением по умолчанию (например, даты публикации)
+    заменяется им для каждой строки отдельно.
+    """
+    if value == "" and field.null:
+        return None
+    if value in ("", None) and field.has_default():
+        return field.get_default()
+    return field.to_python(value)
+
+
+def row_hash(values):
+    """
+    Возвращает хеш строки таблицы. Значения приводятся к строкам,
+    поэтому хеш строки из csv совпадает с хешем той же строки из базы.
+    """
+    return hashlib.sha1(
+        "\x1f".join(map(str, values)).encode("utf-8")
+    ).hexdigest()
 
 
 class Command(BaseCommand):
-    help = "Импортирует данные из csv в базу данных"
+    help = (
+        "Импортирует данные из csv или jsonl (в том числе сжатых gzip) "
+        "в базу данных"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=DATA_DIR,
+            help="Папка с файлами таблиц",
+        )
+        parser.add_argument(
+            "--batch-size",
+            default=DEFAULT_BATCH_SIZE,
+            type=int,
+            help="Количество строк в одном INSERT-запросе",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Количество таблиц, загружаемых параллельно "
+                f"(по умолчанию {DEFAULT_WORKERS}, для SQLite - 1)"
+            ),
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help=(
+                "Записывать только новые и изменённые строки, "
+                "не трогая совпадающие с базой"
+            ),
+        )
 
     def handle(self, *args: Any, **options: Any) -> str | None:
-        self.import_categories()
-        self.import_users()
-        self.import_genres()
-        self.import_titles()
-        self.import_genre_title()
-        self.import_review()
-        self.import_comments()
-
-    def import_categories(self):
-        with open(
-            "static/data/category.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                Category.objects.create(id=row[0], name=row[1], slug=row[2])
-            self.stdout.write(self.style.SUCCESS("Категории загружены"))
-
-    def import_users(self):
-        with open(
-            "static/data/users.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                CustomUser.objects.create(
-                    id=row[0],
-                    username=row[1],
-                    email=row[2],
-                    role=row[3],
-                    bio=row[4],
-                    first_name=row[5],
-                    last_name=row[6],
-                )
-            self.stdout.write(self.style.SUCCESS("Пользователи загружены"))
-
-    def import_genres(self):
-        with open(
-            "static/data/genre.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                Genre.objects.create(id=row[0], name=row[1], slug=row[2])
-            self.stdout.write(self.style.SUCCESS("Жанры загружены"))
-
-    def import_titles(self):
-        with open(
-            "static/data/titles.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                Title.objects.create(
-                    id=row[0], name=row[1], year=row[2], category_id=row[3]
+        workers = options["workers"]
+        if workers is None:
+            workers = 1 if connection.vendor == "sqlite" else DEFAULT_WORKERS
+        elif workers > 1 and connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite не поддерживает параллельную запись, "
+                    "таблицы будут загружены последовательно"
                 )
-            self.stdout.write(self.style.SUCCESS("Произведения загружены"))
-
-    def import_genre_title(self):
-        with open(
-            "static/data/genre_title.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                GenreTitle.objects.create(
-                    id=row[0], title_id=row[1], genre_id=row[2]
+            )
+            workers = 1
+        self.batch_size = options["batch_size"]
+        self.upsert = options["upsert"]
+        self.touched_titles = set()
+        tasks = {
+            model: (find_data_file(options["path"], name), MESSAGES[model])
+            for name, model, _ in TABLES
+        }
+        if workers > 1:
+            results = self.import_parallel(tasks, workers)
+        else:
+            results = self.import_sequential(tasks)
+        for message, stats, elapsed in results:
+            rows = sum(stats.values())
+            report = (
+                f"{message}: {rows} строк за {elapsed:.2f} с "
+                f"({rows / max(elapsed, 1e-9):.0f} строк/с)"
+            )
+            if self.upsert:
+                report += (
+                    f", новых {stats['created']}, "
+                    f"изменённых {stats['updated']}, "
+                    f"без изменений {stats['skipped']}"
                 )
-            self.stdout.write(
-                self.style.SUCCESS("Таблица Genre-title загружена")
+            self.stdout.write(self.style.SUCCESS(report))
+        reset_sequences([model for _, model, _ in TABLES])
+        if self.upsert:
+            Title.objects.filter(pk__in=self.touched_titles).refresh_rating()
+            data_loaded.send(
+                sender=self.__class__,
+                models=list(tasks),
+                title_ids=self.touched_titles,
             )
+        else:
+            Title.objects.refresh_rating()
+            data_loaded.send(sender=self.__class__, models=list(tasks))
 
-    def import_review(self):
-        with open(
-            "static/data/review.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                Review.objects.create(
-                    id=row[0],
-                    title_id=row[1],
-                    text=row[2],
-                    author_id=row[3],
-                    score=row[4],
-                    pub_date=row[5],
-                )
-            self.stdout.write(self.style.SUCCESS("Отзывы загружены"))
-
-    def import_comments(self):
-        with open(
-            "static/data/comments.csv", newline="", encoding="utf-8"
-        ) as csvfile:
-            reader = csv.reader(csvfile, delimiter=",")
-            for count, row in enumerate(reader):
-                if count == 0:
-                    continue
-                Comment.objects.create(
-                    id=row[0],
-                    review_id=row[1],
-                    text=row[2],
-                    author_id=row[3],
-                    pub_date=row[4],
+    def import_sequential(self, tasks):
+        """Загружает таблицы по очереди в порядке TABLES."""
+        for model, (data_file, message) in tasks.items():
+            yield (message, *self.import_table(data_file, model))
+
+    def import_parallel(self, tasks, workers):
+        """
+        Загружает таблицы в пуле потоков: таблица запускается,
+        как только загружены все таблицы, на которые она ссылается.
+        Если таблицы ссылаются друг на друга по кругу, выбрасывается
+        CommandError.
+        """
+        pending = get_dependencies(tasks)
+        loaded = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for model, dependencies in list(pending.items()):
+                    if dependencies <= loaded:
+                        del pending[model]
+                        data_file, _ = tasks[model]
+                        future = executor.submit(
+                            self.import_table_in_thread, data_file, model
+                        )
+                        running[future] = model
+                if not running:
+                    names = ", ".join(
+                        model._meta.model_name for model in pending
+                    )
+                    raise CommandError(
+                        f"Циклическая зависимость между таблицами: {names}"
+                    )
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    model = running.pop(future)
+                    loaded.add(model)
+                    yield (tasks[model][1], *future.result())
+
+    def import_table_in_thread(self, data_file, model):
+        """Загружает таблицу и закрывает соединение потока."""
+        try:
+            return self.import_table(data_file, model)
+        finally:
+            connection.close()
+
+    def import_table(self, data_file, model):
+        """
+        Загружает таблицу пачками через bulk_create
+        в одной транзакции.
+        """
+        path, file_format = data_file
+        started = time.perf_counter()
+        stats = Counter()
+        with open_data_file(path) as file, transaction.atomic():
+            header, reader = read_rows(file, file_format)
+            fields = [model._meta.get_field(column) for column in header]
+            if self.upsert and model._meta.pk not in fields:
+                raise CommandError(
+                    f"В файле {path} нет колонки первичного ключа"
                 )
-            self.stdout.write(self.style.SUCCESS("Комментарии загружены"))
+            for batch in batched(reader, self.batch_size):
+                rows = [
+                    [
+                        to_python(field, value)
+                        for field, value in zip(fields, row)
+                    ]
+                    for row in batch
+                ]
+                if self.upsert:
+                    stats += self.upsert_batch(model, fields, rows)
+                else:
+                    model.objects.bulk_create(
+                        self.build(model, fields, row) for row in rows
+                    )
+                    stats["created"] += len(rows)
+        return stats, time.perf_counter() - started
+
+    def upsert_batch(self, model, fields, rows):
+        """
+        Сравнивает хеши строк пачки с хешами сохранённых строк,
+        полученных одним запросом, и записывает только отличия.
+        """
+        attnames = [field.attname for field in fields]
+        pk_index = fields.index(model._meta.pk)
+        stored = {
+            values[pk_index]: values
+            for values in model.objects.filter(
+                pk__in=[row[pk_index] for row in rows]
+            ).values_list(*attnames)
+        }
+        created = []
+        updated = []
+        for row in rows:
+            values = stored.get(row[pk_index])
+            if values is None:
+                created.append(self.build(model, fields, row))
+            elif row_hash(values) != row_hash(row):
+                updated.append(self.build(model, fields, row))
+                if "title_id" in attnames:
+                    self.touched_titles.add(
+                        values[attnames.index("title_id")]
+                    )
+        model.objects.bulk_create(created)
+        if updated:
+            model.objects.bulk_update(
+                updated,
+                [name for name in attnames if name != model._meta.pk.attname],
+            )
+        if model is Title:
+            self.touched_titles.update(title.pk for title in created + updated)
+        elif "title_id" in attnames:
+            self.touched_titles.update(
+                obj.title_id for obj in created + updated
+            )
+        return Counter(
+            created=len(created),
+            updated=len(updated),
+            skipped=len(rows) - len(created) - len(updated),
+        )
+
+    @staticmethod
+    def build(model, fields, row):
+        """Создаёт объект модели из значений строки."""
+        return model(
+            **{field.attname: value for field, value in zip(fields, row)}
+        )
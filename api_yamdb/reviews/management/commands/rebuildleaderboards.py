@@ -0,0 +1,18 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from reviews import leaderboards
+from reviews.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = "Пересобирает таблицы лучших произведений жанров и категорий"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        leaderboards.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Таблицы лучших пересобраны: "
+                f"{LeaderboardEntry.objects.count()} записей"
+            )
+        )
@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+from reviews.signals import data_loaded
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает хранимые рейтинги произведений по отзывам"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        updated = Title.objects.refresh_rating()
+        data_loaded.send(sender=self.__class__, models=[Title])
+        self.stdout.write(
+            self.style.SUCCESS(f"Рейтинги пересчитаны: {updated}")
+        )
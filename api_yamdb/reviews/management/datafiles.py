@@ -0,0 +1,136 @@
+import csv
+import gzip
+import io
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import chain
+
+from django.core.management.base import CommandError
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+)
+
+
+DATA_DIR = "static/data"
+
+# Имя файла без расширения, модель и колонки файла в порядке загрузки.
+TABLES = (
+    ("category", Category, ("id", "name", "slug")),
+    (
+        "users",
+        CustomUser,
+        (
+            "id",
+            "username",
+            "email",
+            "role",
+            "bio",
+            "first_name",
+            "last_name",
+        ),
+    ),
+    ("genre", Genre, ("id", "name", "slug")),
+    ("titles", Title, ("id", "name", "year", "category", "description")),
+    ("genre_title", GenreTitle, ("id", "title_id", "genre_id")),
+    (
+        "review",
+        Review,
+        ("id", "title_id", "text", "author", "score", "pub_date"),
+    ),
+    ("comments", Comment, ("id", "review_id", "text", "author", "pub_date")),
+)
+
+FORMATS = ("csv", "jsonl")
+
+
+def get_extension(file_format, compress=False):
+    """Возвращает расширение файла для формата выгрузки."""
+    return f".{file_format}.gz" if compress else f".{file_format}"
+
+
+def find_data_file(directory, name):
+    """Ищет файл таблицы в любом из поддерживаемых форматов."""
+    for file_format in FORMATS:
+        for compress in (False, True):
+            path = os.path.join(
+                directory, name + get_extension(file_format, compress)
+            )
+            if os.path.exists(path):
+                return path, file_format
+    raise CommandError(f"Не найден файл таблицы {name} в папке {directory}")
+
+
+@contextmanager
+def open_data_file(path, mode="r"):
+    """
+    Открывает файл таблицы, прозрачно распаковывая gzip. В заголовок
+    сжатого файла не пишется время, чтобы выгрузка одних и тех же
+    данных давала одинаковые файлы.
+    """
+    if not path.endswith(".gz"):
+        with open(path, mode, newline="", encoding="utf-8") as file:
+            yield file
+        return
+    with gzip.GzipFile(path, f"{mode}b", mtime=0) as raw:
+        with io.TextIOWrapper(raw, newline="", encoding="utf-8") as file:
+            yield file
+
+
+def read_rows(file, file_format):
+    """
+    Возвращает заголовок и построчный итератор значений
+    для файла в формате csv или jsonl.
+    """
+    if file_format == "csv":
+        reader = csv.reader(file, delimiter=",")
+        return next(reader), reader
+    lines = (json.loads(line) for line in file if line.strip())
+    first = next(lines, None)
+    if first is None:
+        return [], iter(())
+    header = list(first)
+    rows = (
+        [row.get(column) for column in header]
+        for row in chain((first,), lines)
+    )
+    return header, rows
+
+
+def to_text(value):
+    """Приводит значение из базы к виду, понятному importcsv."""
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def write_rows(file, file_format, header, rows):
+    """Записывает строки таблицы в csv или jsonl, не накапливая их."""
+    count = 0
+    if file_format == "csv":
+        writer = csv.writer(file, delimiter=",")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(map(to_text, row))
+            count += 1
+        return count
+    for row in rows:
+        file.write(
+            json.dumps(
+                dict(zip(header, row)),
+                ensure_ascii=False,
+                default=to_text,
+            )
+        )
+        file.write("\n")
+        count += 1
+    return count
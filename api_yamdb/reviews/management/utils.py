@@ -0,0 +1,20 @@
+"""Общие помощники команд загрузки данных."""
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def batched(iterable, size):
+    """Разбивает поток на списки не длиннее size."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def reset_sequences(models):
+    """Сдвигает счётчики первичных ключей моделей за сохранённые id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
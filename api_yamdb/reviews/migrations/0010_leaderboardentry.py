@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 02:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_rating_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('genre', 'Жанр'), ('category', 'Категория')], max_length=8, verbose_name='Тип группы')),
+                ('group_id', models.PositiveIntegerField(verbose_name='id жанра/категории')),
+                ('rating', models.FloatField(verbose_name='Рейтинг')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'запись рейтинга',
+                'verbose_name_plural': 'Лучшие произведения',
+                'ordering': ('kind', 'group_id', '-rating', '-title'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['kind', 'group_id', '-rating', '-title'], name='leaderboard_group_rating_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'group_id', 'title'), name='leaderboard_group_title_unique'),
+        ),
+    ]
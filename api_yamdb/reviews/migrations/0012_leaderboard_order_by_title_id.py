@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_pub_date_default'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='leaderboardentry',
+            options={'ordering': ('kind', 'group_id', '-rating', '-title_id'), 'verbose_name': 'запись рейтинга', 'verbose_name_plural': 'Лучшие произведения'},
+        ),
+        migrations.RemoveIndex(
+            model_name='leaderboardentry',
+            name='leaderboard_group_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['kind', 'group_id', '-rating', '-title_id'], name='leaderboard_group_rating_idx'),
+        ),
+    ]
@@ -5,6 +5,8 @@ from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -15,7 +17,9 @@ MAX_VALUE_SCORE = 10
 class BaseModel(models.Model):
     """Базовая модель."""
 
-    pub_date = models.DateTimeField("Дата создания", auto_now_add=True)
+    pub_date = models.DateTimeField(
+        "Дата создания", default=timezone.now, editable=False
+    )
 
     class Meta:
         abstract = True
@@ -119,6 +123,109 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений с хранимым рейтингом."""
+
+    def shift_rating(self, score_delta, count_delta):
+        """
+        Сдвигает сумму оценок и количество отзывов на заданные величины
+        и пересчитывает рейтинг одним UPDATE-запросом.
+        """
+        score_sum = models.F("score_sum") + score_delta
+        review_count = models.F("review_count") + count_delta
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=models.Case(
+                models.When(review_count__lte=-count_delta, then=None),
+                default=(
+                    Cast(score_sum, models.FloatField())
+                    / Cast(review_count, models.FloatField())
+                ),
+                output_field=models.FloatField(),
+            ),
+        )
+
+    def facet_counts(self):
+        """
+        Считает произведения выборки по жанрам, категориям и годам
+        одним запросом (UNION ALL трёх группировок).
+
+        Возвращает словарь facet -> список пар (значение, подпись,
+        количество), отсортированный по убыванию количества.
+        """
+        titles = self.order_by().prefetch_related(None).select_related(None)
+        facets = (
+            (
+                "genre",
+                GenreTitle.objects.filter(title__in=titles.values("pk")),
+                "genre__slug",
+                "genre__name",
+                "title",
+            ),
+            ("category", titles, "category__slug", "category__name", "pk"),
+            ("year", titles, "year", "year", "pk"),
+        )
+        queries = [
+            queryset.order_by()
+            .annotate(
+                facet=models.Value(name, output_field=models.CharField()),
+                facet_key=Cast(key, models.CharField()),
+                facet_label=Cast(label, models.CharField()),
+            )
+            .values("facet", "facet_key", "facet_label")
+            .annotate(facet_count=models.Count(counted, distinct=True))
+            .values_list("facet", "facet_key", "facet_label", "facet_count")
+            for name, queryset, key, label, counted in facets
+        ]
+        counts = {name: [] for name, *_ in facets}
+        for name, key, label, count in queries[0].union(
+            *queries[1:], all=True
+        ):
+            if key is not None:
+                counts[name].append((key, label, count))
+        for values in counts.values():
+            values.sort(key=lambda value: (-value[2], value[0]))
+        return counts
+
+    def search(self, query):
+        """
+        Полнотекстовый поиск по названию и описанию с учётом префиксов,
+        результаты сортируются по релевантности (см. reviews.search).
+        """
+        from reviews.search import get_search_backend
+
+        return get_search_backend().search(self, query)
+
+    def refresh_rating(self):
+        """Пересчитывает хранимый рейтинг с нуля по таблице отзывов."""
+        reviews = (
+            Review.objects.filter(title=models.OuterRef("pk"))
+            .order_by()
+            .values("title")
+        )
+        return self.update(
+            score_sum=Coalesce(
+                models.Subquery(
+                    reviews.annotate(total=models.Sum("score")).values("total")
+                ),
+                0,
+            ),
+            review_count=Coalesce(
+                models.Subquery(
+                    reviews.annotate(total=models.Count("pk")).values("total")
+                ),
+                0,
+            ),
+            rating=models.Subquery(
+                reviews.annotate(average=models.Avg("score")).values("average")
+            ),
+        )
+
+
+RATING_FIELDS = ("score_sum", "review_count", "rating")
+
+
 class Title(models.Model):
     """Модель произведения."""
 
@@ -141,8 +248,30 @@ class Title(models.Model):
         null=True,
         verbose_name="Категория",
     )
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Сумма оценок"
+    )
+    review_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество отзывов"
+    )
+    rating = models.FloatField(
+        blank=True, null=True, editable=False, verbose_name="Рейтинг"
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = (
+            models.Index(fields=("-rating", "-id"), name="title_rating_idx"),
+            models.Index(
+                fields=("category", "-rating", "-id"),
+                name="title_category_rating_idx",
+            ),
+            models.Index(
+                fields=("-review_count", "-id"),
+                name="title_review_count_idx",
+            ),
+        )
         ordering = ("name",)
         verbose_name = "произведение"
         verbose_name_plural = "Произведения"
@@ -150,6 +279,23 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Хранимый рейтинг меняется только запросами TitleQuerySet,
+        поэтому при сохранении произведения он не перезаписывается
+        значениями, загруженными вместе с объектом: иначе сохранение
+        устаревшего экземпляра откатывало бы счётчики отзывов.
+        Отложенные поля, как и в Model.save, не сохраняются.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skipped = {*RATING_FIELDS, *self.get_deferred_fields()}
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
     @staticmethod
     def validate(year):
         if dt.datetime.now().year <= year:
@@ -208,6 +354,12 @@ class Review(BaseModel):
                 name="review_author_title_unique",
             ),
         )
+        indexes = (
+            models.Index(
+                fields=("title", "-pub_date", "-id"),
+                name="review_title_pub_date_idx",
+            ),
+        )
         ordering = ("-pub_date",)
         verbose_name = "отзыв"
         verbose_name_plural = "Отзывы"
@@ -234,9 +386,89 @@ class Comment(BaseModel):
     )
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=("review", "-pub_date", "-id"),
+                name="comment_review_pub_date_idx",
+            ),
+        )
         ordering = ("-pub_date",)
         verbose_name = "комментарий"
         verbose_name_plural = "Комментарии"
 
     def __str__(self):
         return self.text
+
+
+class QueuedEmail(BaseModel):
+    """Модель письма в очереди на отправку."""
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    from_email = models.CharField(max_length=254, verbose_name="Отправитель")
+    to = models.TextField(verbose_name="Получатели")
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Количество попыток"
+    )
+    next_attempt_at = models.DateTimeField(
+        db_index=True,
+        default=timezone.now,
+        verbose_name="Время следующей попытки",
+    )
+
+    class Meta:
+        ordering = ("pk",)
+        verbose_name = "письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+
+    def __str__(self):
+        return self.subject
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Запись в таблице лучших произведений жанра или категории.
+    Для каждой группы хранится не больше LEADERBOARD_SIZE записей
+    (см. reviews.leaderboards).
+    """
+
+    class Kinds(models.TextChoices):
+        GENRE = ("genre", _("Жанр"))
+        CATEGORY = ("category", _("Категория"))
+
+    kind = models.CharField(
+        choices=Kinds.choices,
+        max_length=len(Kinds.CATEGORY),
+        verbose_name="Тип группы",
+    )
+    group_id = models.PositiveIntegerField(verbose_name="id жанра/категории")
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries",
+        verbose_name="Произведение",
+    )
+    rating = models.FloatField(verbose_name="Рейтинг")
+    review_count = models.PositiveIntegerField(
+        verbose_name="Количество отзывов"
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("kind", "group_id", "title"),
+                name="leaderboard_group_title_unique",
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("kind", "group_id", "-rating", "-title_id"),
+                name="leaderboard_group_rating_idx",
+            ),
+        )
+        ordering = ("kind", "group_id", "-rating", "-title_id")
+        verbose_name = "запись рейтинга"
+        verbose_name_plural = "Лучшие произведения"
+
+    def __str__(self):
+        return f"{self.kind} {self.group_id}: {self.title_id}"
@@ -0,0 +1,278 @@
+"""
+Полнотекстовый поиск произведений по названию и описанию.
+
+На SQLite используется таблица FTS5 с внешним содержимым
+(reviews_title_fts), которую поддерживают триггеры на таблице
+произведений (см. миграцию 0008_title_search). На других СУБД или без
+FTS5 используется инвертированный индекс в памяти процесса. Процесс
+обновляет его сигналами модели Title сам и отмечает изменение версией
+в кэше default; другие процессы, увидев новую версию, перестраивают
+индекс из базы данных. Поэтому при нескольких процессах сервера кэш
+default должен быть общим (Memcached, Redis), с LocMemCache индекс
+согласован только в пределах процесса.
+
+Каждое слово запроса ищется по префиксу, результаты сортируются
+по BM25, название весит больше описания.
+"""
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "reviews_title_fts"
+VERSION_KEY = "reviews:search:version"
+COLUMNS = ("name", "description")
+# Веса колонок в BM25.
+WEIGHTS = (10.0, 1.0)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    """
+    Разбивает текст на слова аналогично токенизатору unicode61:
+    без учёта регистра и диакритических знаков.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"[^\W_]+", text)
+
+
+class SQLiteSearchBackend:
+    """Поиск по таблице FTS5."""
+
+    def search(self, queryset, query):
+        match = " ".join(f'"{token}"*' for token in tokenize(query))
+        if not match:
+            return queryset.none()
+        weights = ", ".join(map(str, WEIGHTS))
+        quote_name = connection.ops.quote_name
+        meta = queryset.model._meta
+        title_pk = f"{quote_name(meta.db_table)}.{quote_name(meta.pk.column)}"
+        return (
+            queryset.filter(
+                pk__in=RawSQL(
+                    f"SELECT rowid FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s",
+                    (match,),
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s "
+                    f"AND rowid = {title_pk}",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "pk")
+        )
+
+
+def get_shared_version():
+    """Возвращает версию произведений, общую для процессов."""
+    return cache.get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def bump_shared_version():
+    """Отмечает изменение произведений и возвращает новую версию."""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+        return None
+
+
+class InMemorySearchIndex:
+    """
+    Инвертированный индекс произведений в памяти процесса.
+
+    Индекс строится из базы данных при первом поиске и перестраивается,
+    если общая версия произведений изменилась в другом процессе.
+    Изменения, сделанные в этом процессе, применяются к индексу
+    на месте (см. update).
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.version = None
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            # слово -> {id произведения: частоты слова по колонкам}
+            self.postings = defaultdict(dict)
+            # id произведения -> (слова, длины колонок)
+            self.documents = {}
+            self.total_lengths = [0] * len(COLUMNS)
+            self.sorted_tokens = None
+
+    def invalidate(self):
+        """Перестраивает индекс из базы данных при следующем поиске."""
+        with self.lock:
+            self.loaded = False
+            self.clear()
+
+    def ensure_loaded(self):
+        from reviews.models import Title
+
+        version = get_shared_version()
+        with self.lock:
+            if self.loaded and self.version == version:
+                return
+            self.clear()
+            for pk, *values in Title.objects.values_list(
+                "pk", *COLUMNS
+            ).iterator():
+                self.add(pk, values)
+            self.loaded = True
+            self.version = version
+
+    def update(self, pk, values=None):
+        """
+        Применяет сохранение (values - значения COLUMNS) или удаление
+        произведения и сообщает о нём другим процессам. Если перед этим
+        произведения менялись в другом процессе, индекс перестроится
+        при следующем поиске.
+        """
+        version = bump_shared_version()
+        with self.lock:
+            if not self.loaded:
+                return
+            if version is None or version != self.version + 1:
+                self.invalidate()
+                return
+            self.version = version
+            if values is None:
+                self.remove(pk)
+            else:
+                self.add(pk, values)
+
+    def add(self, pk, values):
+        with self.lock:
+            self.remove(pk)
+            columns = [tokenize(value) for value in values]
+            for number, tokens in enumerate(columns):
+                for token in tokens:
+                    frequencies = self.postings[token].setdefault(
+                        pk, [0] * len(COLUMNS)
+                    )
+                    frequencies[number] += 1
+                self.total_lengths[number] += len(tokens)
+            self.documents[pk] = (
+                {token for tokens in columns for token in tokens},
+                [len(tokens) for tokens in columns],
+            )
+            self.sorted_tokens = None
+
+    def remove(self, pk):
+        with self.lock:
+            document = self.documents.pop(pk, None)
+            if document is None:
+                return
+            tokens, lengths = document
+            for token in tokens:
+                self.postings[token].pop(pk, None)
+                if not self.postings[token]:
+                    del self.postings[token]
+            for number, length in enumerate(lengths):
+                self.total_lengths[number] -= length
+            self.sorted_tokens = None
+
+    def expand(self, prefix):
+        """Возвращает слова индекса, начинающиеся с префикса."""
+        if self.sorted_tokens is None:
+            self.sorted_tokens = sorted(self.postings)
+        start = bisect.bisect_left(self.sorted_tokens, prefix)
+        end = bisect.bisect_left(self.sorted_tokens, prefix + "\U0010ffff")
+        return self.sorted_tokens[start:end]
+
+    def search(self, query):
+        """Возвращает список пар (id, оценка BM25) по убыванию оценки."""
+        self.ensure_loaded()
+        with self.lock:
+            count = len(self.documents)
+            if not count:
+                return []
+            average = [total / count or 1 for total in self.total_lengths]
+            scores = None
+            for prefix in tokenize(query):
+                matches = defaultdict(lambda: [0] * len(COLUMNS))
+                for token in self.expand(prefix):
+                    for pk, frequencies in self.postings[token].items():
+                        totals = matches[pk]
+                        for number, frequency in enumerate(frequencies):
+                            totals[number] += frequency
+                if scores is None:
+                    scores = dict.fromkeys(matches, 0.0)
+                else:
+                    scores = {pk: scores[pk] for pk in scores if pk in matches}
+                idf = math.log(
+                    (count - len(matches) + 0.5) / (len(matches) + 0.5) + 1
+                )
+                for pk in scores:
+                    lengths = self.documents[pk][1]
+                    for number, frequency in enumerate(matches[pk]):
+                        norm = BM25_K1 * (
+                            1 - BM25_B + BM25_B * lengths[number]
+                            / average[number]
+                        )
+                        scores[pk] += (
+                            WEIGHTS[number] * idf * frequency
+                            * (BM25_K1 + 1) / (frequency + norm)
+                        )
+            if not scores:
+                return []
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class InMemorySearchBackend:
+    """Поиск по инвертированному индексу в памяти процесса."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def search(self, queryset, query):
+        results = self.index.search(query)
+        if not results:
+            return queryset.none()
+        return (
+            queryset.filter(pk__in=[pk for pk, _ in results])
+            .annotate(
+                search_rank=Case(
+                    *(When(pk=pk, then=Value(score)) for pk, score in results),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "pk")
+        )
+
+
+memory_index = InMemorySearchIndex()
+_backends = {}
+
+
+def get_search_backend():
+    """Выбирает поиск FTS5, если таблица индекса есть в базе данных."""
+    alias = connection.alias
+    if alias not in _backends:
+        if (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        ):
+            _backends[alias] = SQLiteSearchBackend()
+        else:
+            _backends[alias] = InMemorySearchBackend(memory_index)
+    return _backends[alias]
@@ -0,0 +1,164 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import Signal, receiver
+
+from reviews import leaderboards
+from reviews.models import Category, Genre, LeaderboardEntry, Review, Title
+from reviews.search import COLUMNS, bump_shared_version, memory_index
+
+# Отправляется после массовой записи в обход сигналов моделей
+# (bulk_create, bulk_update, update), sender - команда или модуль,
+# models - изменённые модели, необязательный title_ids - произведения,
+# рейтинг, категория или жанры которых могли измениться, если запись
+# затронула только их.
+data_loaded = Signal()
+
+
+def get_rating_state(review):
+    """
+    Возвращает пару (произведение, оценка), учтённую в рейтинге,
+    либо None, если поля отзыва загружены не полностью.
+    """
+    values = review.__dict__
+    if "title_id" not in values or "score" not in values:
+        return None
+    return values["title_id"], values["score"]
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """Запоминает оценку отзыва в момент загрузки из базы данных."""
+    instance._rating_state = get_rating_state(instance)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    """Инкрементально обновляет рейтинг при создании и правке отзыва."""
+    if raw:
+        return
+    previous = None if created else instance._rating_state
+    current = get_rating_state(instance)
+    changed = {instance.title_id}
+    if created:
+        Title.objects.filter(pk=instance.title_id).shift_rating(
+            instance.score, 1
+        )
+    elif previous is None or current is None:
+        Title.objects.filter(pk=instance.title_id).refresh_rating()
+    elif previous[0] != current[0]:
+        Title.objects.filter(pk=previous[0]).shift_rating(-previous[1], -1)
+        Title.objects.filter(pk=current[0]).shift_rating(current[1], 1)
+        changed.add(previous[0])
+    elif previous[1] != current[1]:
+        Title.objects.filter(pk=current[0]).shift_rating(
+            current[1] - previous[1], 0
+        )
+    else:
+        changed.clear()
+    instance._rating_state = current
+    for title_id in changed:
+        leaderboards.schedule_update(title_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга произведения."""
+    state = instance._rating_state
+    if state is None:
+        Title.objects.filter(pk=instance.title_id).refresh_rating()
+    else:
+        Title.objects.filter(pk=state[0]).shift_rating(-state[1], -1)
+    leaderboards.schedule_update(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def update_search_index_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Обновляет индекс поиска в памяти после фиксации транзакции,
+    чтобы другие процессы перестраивали его по уже записанным данным.
+    """
+    if not raw:
+        pk = instance.pk
+        values = [getattr(instance, column) for column in COLUMNS]
+        transaction.on_commit(lambda: memory_index.update(pk, values))
+
+
+@receiver(post_delete, sender=Title)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: memory_index.update(pk))
+
+
+@receiver(data_loaded)
+def invalidate_search_index(sender, **kwargs):
+    """После массовой загрузки индекс в памяти строится заново."""
+    bump_shared_version()
+    memory_index.invalidate()
+
+
+@receiver(post_save, sender=Title)
+def update_leaderboards_on_title_save(sender, instance, created, raw=False,
+                                      **kwargs):
+    """Переносит произведение в таблицы лучших новой категории."""
+    if not created and not raw:
+        leaderboards.schedule_update(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_leaderboards_on_genre_change(sender, instance, action, reverse,
+                                        pk_set, **kwargs):
+    """Обновляет таблицы лучших при изменении жанров произведения."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        leaderboards.schedule_update(instance.pk)
+    elif pk_set is not None:
+        for title_id in pk_set:
+            leaderboards.schedule_update(title_id)
+    else:
+        leaderboards.schedule_rebuild([(leaderboards.GENRE, instance.pk)])
+
+
+@receiver(pre_delete, sender=Title)
+def remember_title_leaderboards(sender, instance, **kwargs):
+    """Запоминает таблицы лучших, из которых удаляется произведение."""
+    instance._leaderboard_groups = list(
+        LeaderboardEntry.objects.filter(title=instance)
+        .values_list("kind", "group_id")
+    )
+
+
+@receiver(post_delete, sender=Title)
+def refill_leaderboards_on_title_delete(sender, instance, **kwargs):
+    """Заполняет освободившиеся места в таблицах лучших."""
+    groups = getattr(instance, "_leaderboard_groups", None)
+    if groups:
+        leaderboards.schedule_rebuild(groups)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def delete_group_leaderboard(sender, instance, **kwargs):
+    """Удаляет таблицу лучших удалённого жанра или категории."""
+    kind = (
+        leaderboards.CATEGORY if sender is Category else leaderboards.GENRE
+    )
+    LeaderboardEntry.objects.filter(kind=kind, group_id=instance.pk).delete()
+
+
+@receiver(data_loaded)
+def rebuild_leaderboards(sender, title_ids=None, **kwargs):
+    """
+    После массовой загрузки таблицы лучших строятся заново, а если
+    известны затронутые произведения - обновляются только их таблицы.
+    """
+    if title_ids is None:
+        leaderboards.rebuild()
+    elif title_ids:
+        leaderboards.update_titles(list(title_ids))
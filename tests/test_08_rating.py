@@ -0,0 +1,101 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import LeaderboardEntry, Title
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_rating(client, title_id) is None
+
+        create_single_review(admin_client, title_id, 'Отлично', 10)
+        review_id = create_single_review(
+            user_client, title_id, 'Так себе', 4
+        ).json()['id']
+        assert self.get_rating(client, title_id) == 7, (
+            'Проверьте, что рейтинг произведения обновляется при создании '
+            'отзыва.'
+        )
+
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+        response = user_client.patch(review_url, data={'score': 6})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 8, (
+            'Проверьте, что рейтинг произведения обновляется при изменении '
+            'оценки в отзыве.'
+        )
+
+        response = user_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 10, (
+            'Проверьте, что рейтинг произведения обновляется при удалении '
+            'отзыва.'
+        )
+
+    def test_02_rebuild_ratings_command(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Хорошо', 8)
+        Title.objects.update(score_sum=0, review_count=0, rating=None)
+        LeaderboardEntry.objects.all().delete()
+        assert self.get_rating(client, title_id) is None
+
+        call_command('rebuildratings', stdout=StringIO())
+        assert self.get_rating(client, title_id) == 8, (
+            'Проверьте, что команда `rebuildratings` пересчитывает '
+            'рейтинги произведений и сбрасывает кэш ответов.'
+        )
+        assert LeaderboardEntry.objects.filter(
+            title_id=title_id, rating=8
+        ).exists(), (
+            'Проверьте, что после `rebuildratings` таблицы лучших '
+            'строятся по новым рейтингам.'
+        )
+
+    def test_03_stale_title_save_keeps_rating(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        create_single_review(admin_client, title_id, 'Хорошо', 8)
+        stale.name = 'Терминатор 2'
+        stale.save()
+        title = Title.objects.get(pk=title_id)
+        assert (title.name, title.review_count, title.rating) == (
+            'Терминатор 2', 1, 8
+        ), (
+            'Проверьте, что сохранение ранее загруженного произведения '
+            'не перезаписывает его рейтинг и количество отзывов.'
+        )
+        deferred = Title.objects.defer('description').get(pk=title_id)
+        deferred.year = 1991
+        with CaptureQueriesContext(connection) as context:
+            deferred.save()
+        assert 'description' not in context.captured_queries[0]['sql'], (
+            'Проверьте, что отложенные поля не загружаются и не '
+            'сохраняются при сохранении произведения.'
+        )
+        title.refresh_from_db()
+        assert (title.year, title.description) == (1991, 'I`ll be back')
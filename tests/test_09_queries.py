@@ -0,0 +1,43 @@
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+def create_titles_with_relations(count):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+    for number in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=2000, category=category
+        )
+        title.genre.set(genres)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Queries:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.mark.parametrize('titles_count', [1, 5])
+    def test_01_titles_list_query_count(self, client, titles_count,
+                                        django_assert_num_queries):
+        create_titles_with_relations(titles_count)
+        with django_assert_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == titles_count, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` возвращает '
+            'все произведения.'
+        )
+
+    def test_02_title_detail_query_count(self, client,
+                                         django_assert_num_queries):
+        create_titles_with_relations(1)
+        title = Title.objects.get()
+        with django_assert_num_queries(2):
+            response = client.get(f'{self.TITLES_URL}{title.id}/')
+        assert len(response.json()['genre']) == 2, (
+            'Проверьте, что ответ на GET-запрос к '
+            f'`{self.TITLES_URL}{{title_id}}/` содержит жанры произведения.'
+        )
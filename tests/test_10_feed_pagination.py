@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from reviews.models import Category, CustomUser, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10FeedPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def create_reviews(self, count):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        for number in range(count):
+            author = CustomUser.objects.create(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {number}', score=5
+            )
+        return title
+
+    def test_01_cursor_walks_whole_feed(self, client):
+        title = self.create_reviews(12)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        expected_ids = list(
+            Review.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+
+        received_ids = []
+        next_url = f'{url}?cursor='
+        while next_url:
+            response = client.get(next_url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}?cursor=` возвращает '
+                'ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора не выполняется подсчёт '
+                'общего количества отзывов.'
+            )
+            received_ids.extend(review['id'] for review in data['results'])
+            next_url = data['next']
+        assert received_ids == expected_ids, (
+            'Проверьте, что пагинация по курсору возвращает все отзывы '
+            'в порядке убывания даты публикации без пропусков и повторов.'
+        )
+
+    def test_02_invalid_cursor(self, client):
+        title = self.create_reviews(1)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        response = client.get(f'{url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что при некорректном курсоре возвращается ответ '
+            'со статусом 404.'
+        )
+
+    def test_03_page_number_by_default(self, client):
+        title = self.create_reviews(6)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        data = client.get(url).json()
+        assert data['count'] == 6, (
+            'Проверьте, что без параметра `cursor` используется постраничная '
+            'пагинация.'
+        )
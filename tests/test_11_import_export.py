@@ -0,0 +1,66 @@
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def read_dir(path):
+    return {
+        name: open(os.path.join(path, name), 'rb').read()
+        for name in sorted(os.listdir(path))
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ImportExport:
+
+    def test_01_import(self):
+        call_command('importcsv', path=DATA_DIR, batch_size=10,
+                     stdout=StringIO())
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+        assert str(Review.objects.get(pk=1).pub_date.date()) == '2019-09-24', (
+            'Проверьте, что команда `importcsv` сохраняет даты публикации '
+            'из файлов.'
+        )
+        assert Title.objects.get(pk=1).rating == 10, (
+            'Проверьте, что после импорта пересчитываются рейтинги.'
+        )
+
+    @pytest.mark.parametrize('options', [
+        {'format': 'csv'},
+        {'format': 'jsonl', 'gzip': True},
+    ])
+    def test_02_export_round_trip(self, tmp_path, options):
+        call_command('importcsv', path=DATA_DIR, stdout=StringIO())
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        call_command('exportdata', path=str(first), stdout=StringIO(),
+                     **options)
+        for model in (CustomUser, Title, Category, Genre):
+            model.objects.all().delete()
+
+        call_command('importcsv', path=str(first), stdout=StringIO())
+        call_command('exportdata', path=str(second), stdout=StringIO(),
+                     **options)
+        assert read_dir(first) == read_dir(second), (
+            'Проверьте, что данные, выгруженные командой `exportdata`, '
+            'загружаются командой `importcsv` без изменений.'
+        )
+
+    def test_03_upsert_skips_unchanged_rows(self):
+        call_command('importcsv', path=DATA_DIR, stdout=StringIO())
+        Review.objects.filter(pk=1).update(score=1)
+        output = StringIO()
+        call_command('importcsv', path=DATA_DIR, upsert=True, stdout=output)
+        assert 'Отзывы загружены: 72 строк' in output.getvalue()
+        assert 'новых 0, изменённых 1, без изменений 71' in output.getvalue()
+        assert Review.objects.get(pk=1).score == 10
+        assert Title.objects.get(pk=1).rating == 10, (
+            'Проверьте, что режим `--upsert` пересчитывает рейтинг '
+            'затронутых произведений.'
+        )
@@ -0,0 +1,158 @@
+import os
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from api.cache import get_versions
+from django.core.management import call_command
+from django.db import transaction
+from reviews.models import Genre, Title
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+
+    def test_01_anonymous_list_served_from_cache(self, client, admin_client,
+                                                 django_assert_num_queries):
+        create_titles(admin_client)
+        first = client.get(self.TITLES_URL, {'year': 1984})
+        with django_assert_num_queries(0):
+            second = client.get(self.TITLES_URL, {'year': 1984})
+        assert second.status_code == HTTPStatus.OK
+        assert second.content == first.content, (
+            'Проверьте, что повторный анонимный GET-запрос к '
+            f'`{self.TITLES_URL}` возвращает тот же ответ из кэша.'
+        )
+
+    def test_02_writes_invalidate_cache(self, client, admin_client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        assert client.get(title_url).json()['rating'] is None
+
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        assert client.get(title_url).json()['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения.'
+        )
+
+        response = admin_client.patch(title_url, data={'name': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        names = [
+            title['name']
+            for title in client.get(self.TITLES_URL).json()['results']
+        ]
+        assert 'Новое' in names, (
+            'Проверьте, что изменение произведения сбрасывает кэш списка '
+            'произведений.'
+        )
+
+        admin_client.delete(f'{self.GENRES_URL}{titles[1]["genre"][0]}/')
+        data = client.get(f'{self.TITLES_URL}{titles[1]["id"]}/').json()
+        assert data['genre'] == [], (
+            'Проверьте, что удаление жанра сбрасывает кэш произведений.'
+        )
+
+    def test_03_model_writes_invalidate_cache(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        client.get(title_url)
+        client.get(self.GENRES_URL)
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        title.name = 'Изменено в админке'
+        title.save()
+        assert client.get(title_url).json()['name'] == title.name, (
+            'Проверьте, что сохранение произведения вне API сбрасывает кэш.'
+        )
+
+        title.genre.remove(Genre.objects.get(slug=titles[0]['genre'][0]))
+        assert len(client.get(title_url).json()['genre']) == 1, (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш.'
+        )
+
+        Genre.objects.create(name='Вестерн', slug='western')
+        slugs = [
+            genre['slug']
+            for genre in client.get(self.GENRES_URL).json()['results']
+        ]
+        assert 'western' in slugs, (
+            'Проверьте, что создание жанра сбрасывает кэш списка жанров.'
+        )
+
+    def test_04_import_invalidates_cache(self, client):
+        assert client.get(self.TITLES_URL).json()['count'] == 0
+        call_command(
+            'importcsv',
+            path=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            stdout=StringIO(),
+        )
+        assert client.get(self.TITLES_URL).json()['count'] == 32, (
+            'Проверьте, что загрузка данных командой `importcsv` '
+            'сбрасывает кэш.'
+        )
+
+    def test_05_lookup_normalized(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'{self.TITLES_URL}0{titles[0]["id"]}/'
+        assert client.get(title_url).json()['name'] == titles[0]['name']
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        title.name = 'Переименовано'
+        title.save()
+        assert client.get(title_url).json()['name'] == title.name, (
+            'Проверьте, что кэш объекта сбрасывается, даже если его id '
+            'записан в URL с ведущими нулями.'
+        )
+
+    def test_06_cached_headers(self, client, admin_client,
+                               django_assert_num_queries):
+        create_titles(admin_client)
+        first = client.get(self.TITLES_URL)
+        with django_assert_num_queries(0):
+            second = client.get(self.TITLES_URL)
+        for header in ('Content-Type', 'Allow', 'Vary'):
+            assert second.get(header) == first.get(header), (
+                'Проверьте, что ответ из кэша содержит заголовок '
+                f'`{header}` исходного ответа.'
+            )
+
+    def test_07_repeated_params_order(self, client, admin_client):
+        create_titles(admin_client)
+        names = [
+            [
+                title['name'] for title in client.get(
+                    f'{self.TITLES_URL}?year={first}&year={last}'
+                ).json()['results']
+            ]
+            for first, last in ((1984, 1988), (1988, 1984))
+        ]
+        assert names == [['Крепкий орешек'], ['Терминатор']], (
+            'Проверьте, что запросы с повторяющимся параметром в разном '
+            'порядке кэшируются отдельно.'
+        )
+
+    def test_08_invalidated_after_commit(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        etag = client.get(title_url)['ETag']
+        namespaces = ['titles', f'titles:{titles[0]["id"]}']
+        versions = get_versions(namespaces)
+        with transaction.atomic():
+            title = Title.objects.get(pk=titles[0]['id'])
+            title.name = 'Переименовано'
+            title.save()
+            title.genre.clear()
+            assert get_versions(namespaces) == versions, (
+                'Проверьте, что кэш сбрасывается только после фиксации '
+                'транзакции: иначе параллельный запрос сохранит старый '
+                'ответ под новой версией.'
+            )
+        response = client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['name'] == 'Переименовано'
@@ -0,0 +1,132 @@
+import queue
+import time
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from reviews.models import QueuedEmail
+
+from api.mail import ThreadPoolEmailQueue, get_email_queue
+
+
+def wait_until_sent(email_queue, timeout=2):
+    """Ждёт, пока потоки разберут очередь, не дольше timeout секунд."""
+    deadline = time.monotonic() + timeout
+    while (
+        email_queue.queue.unfinished_tasks and time.monotonic() < deadline
+    ):
+        time.sleep(0.01)
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13EmailQueue:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    SIGNUP_DATA = {'email': 'queue@yamdb.fake', 'username': 'queue'}
+
+    def test_01_thread_pool_queue(self, client, settings):
+        settings.EMAIL_QUEUE = {'BACKEND': 'api.mail.ThreadPoolEmailQueue'}
+        response = client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        assert response.status_code == 200
+        get_email_queue().drain()
+        assert [message.to for message in mail.outbox] == [
+            [self.SIGNUP_DATA['email']]
+        ], (
+            'Проверьте, что письмо с кодом подтверждения отправляется '
+            'фоновой очередью.'
+        )
+
+    def test_02_database_queue_drained_by_command(self, client, settings):
+        settings.EMAIL_QUEUE = {'BACKEND': 'api.mail.DatabaseEmailQueue'}
+        client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+        assert QueuedEmail.objects.count() == 1
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при регистрации письмо только ставится '
+            'в очередь.'
+        )
+
+        call_command('drainmail', stdout=StringIO())
+        assert len(mail.outbox) == 1
+        assert not QueuedEmail.objects.exists(), (
+            'Проверьте, что команда `drainmail` удаляет отправленные письма '
+            'из очереди.'
+        )
+
+    def test_03_database_queue_retries_later(self, client, settings):
+        settings.EMAIL_QUEUE = {'BACKEND': 'api.mail.DatabaseEmailQueue'}
+        settings.EMAIL_BACKEND = 'tests.test_13_email_queue.FailingBackend'
+        client.post(self.URL_SIGNUP, data=self.SIGNUP_DATA)
+
+        call_command('drainmail', stdout=StringIO())
+        email = QueuedEmail.objects.get()
+        assert email.attempts == 1, (
+            'Проверьте, что неудачная отправка откладывает письмо для '
+            'повторной попытки.'
+        )
+        assert email.next_attempt_at > email.pub_date
+
+    def test_04_drainmail_uses_database_queue(self, settings):
+        settings.EMAIL_QUEUE = {'BACKEND': 'api.mail.ThreadPoolEmailQueue'}
+        QueuedEmail.objects.create(
+            subject='Код', body='123', from_email='from@yamdb.fake',
+            to='queue@yamdb.fake',
+        )
+        output = StringIO()
+        call_command('drainmail', stdout=output)
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда `drainmail` разбирает очередь в базе '
+            'данных при любой настройке `EMAIL_QUEUE`.'
+        )
+        assert 'QueuedEmail' in output.getvalue()
+
+    def test_05_thread_pool_retry_does_not_block(self, monkeypatch):
+        email_queue = ThreadPoolEmailQueue(retry_delay=0.5, max_retries=1)
+        message = EmailMessage(subject='Код', to=['queue@yamdb.fake'])
+        monkeypatch.setattr(
+            email_queue, 'deliver', lambda messages: list(messages)
+        )
+        started = time.monotonic()
+        email_queue.send_batch([(1, message)])
+        assert time.monotonic() - started < 0.4, (
+            'Проверьте, что повторная отправка не блокирует поток '
+            'очереди на время задержки.'
+        )
+        assert email_queue.queue.get(timeout=2) == (2, message), (
+            'Проверьте, что неотправленное письмо возвращается в очередь '
+            'со следующим номером попытки.'
+        )
+        email_queue.send_batch([(2, message)])
+        with pytest.raises(queue.Empty):
+            email_queue.queue.get(timeout=1)
+
+    def test_06_thread_pool_survives_errors(self, monkeypatch):
+        email_queue = ThreadPoolEmailQueue(workers=1, max_retries=0)
+        message = EmailMessage(subject='Код', to=['queue@yamdb.fake'])
+
+        def get_connection():
+            raise ConnectionError('Почтовый сервер недоступен')
+
+        monkeypatch.setattr('api.mail.get_connection', get_connection)
+        email_queue.enqueue(message)
+        wait_until_sent(email_queue)
+        monkeypatch.setattr(
+            email_queue, 'send_batch', lambda batch: 1 / 0
+        )
+        email_queue.enqueue(message)
+        wait_until_sent(email_queue)
+        monkeypatch.undo()
+        email_queue.enqueue(message)
+        wait_until_sent(email_queue)
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что ошибка при отправке пачки не останавливает '
+            'потоки очереди писем.'
+        )
@@ -0,0 +1,187 @@
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import CustomUser, Review, Title
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import denylist
+from api.utils import get_tokens_for_user
+
+
+def get_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_denylist():
+    denylist.clear()
+    yield
+    denylist.clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14StatelessAuth:
+
+    URL_CATEGORIES = '/api/v1/categories/'
+
+    def create_category(self, client, slug='films'):
+        return client.post(
+            self.URL_CATEGORIES, data={'name': 'Фильмы', 'slug': slug}
+        )
+
+    def test_01_token_contains_claims(self, admin):
+        token = AccessToken(get_tokens_for_user(admin)['token'])
+        assert token['role'] == 'admin'
+        assert token['is_admin'] is True, (
+            'Проверьте, что роль и признаки администратора передаются '
+            'в claims токена.'
+        )
+
+    def test_02_write_without_user_lookup(self, admin):
+        client = get_client(get_tokens_for_user(admin)['token'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create_category(client)
+        assert response.status_code == 201
+        user_table = CustomUser._meta.db_table
+        assert not [
+            query for query in queries
+            if f'FROM "{user_table}"' in query['sql']
+        ], (
+            'Проверьте, что при токене с claims пользователь не загружается '
+            'из базы данных.'
+        )
+
+    def test_03_token_without_claims(self, admin_client):
+        response = self.create_category(admin_client)
+        assert response.status_code == 201, (
+            'Проверьте, что токены без claims по-прежнему принимаются.'
+        )
+
+    def test_04_role_change_makes_claims_stale(self, admin):
+        client = get_client(get_tokens_for_user(admin)['token'])
+        admin.role = 'user'
+        admin.save()
+        response = self.create_category(client)
+        assert response.status_code == 403, (
+            'Проверьте, что после изменения роли права проверяются '
+            'по базе данных, а не по claims старого токена.'
+        )
+
+    def test_05_revoked_token(self, admin):
+        token = get_tokens_for_user(admin)['token']
+        denylist.revoke_token(AccessToken(token))
+        response = self.create_category(get_client(token))
+        assert response.status_code == 401, (
+            'Проверьте, что отозванный токен отклоняется.'
+        )
+
+    def test_06_author_edits_own_review(self, user, moderator):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        response = get_client(get_tokens_for_user(user)['token']).patch(
+            url, data={'text': 'Новый текст'}
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что автор может изменить свой отзыв '
+            'с токеном, содержащим claims.'
+        )
+        response = get_client(get_tokens_for_user(moderator)['token']).delete(
+            url
+        )
+        assert response.status_code == 204
+        other = CustomUser.objects.create_user(
+            username='Other', email='other@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        response = get_client(get_tokens_for_user(other)['token']).patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/',
+            data={'text': 'Чужой текст'},
+        )
+        assert response.status_code == 403
+
+    def test_07_unchanged_claims_not_marked(self, client, admin):
+        data = {'email': 'signup@yamdb.fake', 'username': 'signup'}
+        for _ in range(2):
+            response = client.post('/api/v1/auth/signup/', data=data)
+            assert response.status_code == 200
+        admin.bio = 'Новая биография'
+        admin.save()
+        assert not denylist.entries, (
+            'Проверьте, что сохранение пользователя без изменения роли, '
+            '`is_staff` и `is_active` не ставит отметку в denylist.'
+        )
+        admin.role = 'user'
+        admin.save(update_fields=['bio'])
+        assert not denylist.entries
+        admin.save(update_fields=['role'])
+        assert f'user:{admin.pk}' in denylist.entries, (
+            'Проверьте, что изменение роли ставит отметку в denylist.'
+        )
+        denylist.clear()
+        user = CustomUser.objects.get(pk=admin.pk)
+        user.is_active = False
+        user.save()
+        assert f'user:{admin.pk}' in denylist.entries, (
+            'Проверьте, что отключение пользователя ставит отметку '
+            'в denylist.'
+        )
+
+    def test_08_evicted_mark_fails_closed(self, admin, monkeypatch):
+        token = get_tokens_for_user(admin)['token']
+        monkeypatch.setattr(denylist, 'max_size', 1)
+        admin.role = 'user'
+        admin.save()
+        denylist.mark_user_changed(admin.pk + 1000)
+        assert f'user:{admin.pk}' not in denylist.entries
+        response = self.create_category(get_client(token))
+        assert response.status_code == 403, (
+            'Проверьте, что вытеснение отметки об изменении пользователя '
+            'из denylist не возвращает силу claims старых токенов.'
+        )
+
+    def test_09_logout_revokes_token(self, admin):
+        token = get_tokens_for_user(admin)['token']
+        client = get_client(token)
+        response = client.post('/api/v1/auth/logout/')
+        assert response.status_code == 204, (
+            'Проверьте, что POST-запрос к `/api/v1/auth/logout/` '
+            'возвращает 204.'
+        )
+        response = self.create_category(client)
+        assert response.status_code == 401, (
+            'Проверьте, что после выхода токен отклоняется.'
+        )
+        assert APIClient().post('/api/v1/auth/logout/').status_code == 401
+
+    def test_10_upsert_demotion_makes_claims_stale(self, admin, tmp_path):
+        client = get_client(get_tokens_for_user(admin)['token'])
+        data_dir = tmp_path / 'data'
+        shutil.copytree(
+            os.path.join(settings.BASE_DIR, 'static', 'data'), data_dir
+        )
+        with open(data_dir / 'users.csv', 'a', encoding='utf-8') as file:
+            file.write(
+                f'\n{admin.pk},{admin.username},{admin.email},user,,,'
+            )
+        call_command('importcsv', path=str(data_dir), upsert=True,
+                     stdout=StringIO())
+        assert CustomUser.objects.get(pk=admin.pk).role == 'user'
+        response = self.create_category(client)
+        assert response.status_code == 403, (
+            'Проверьте, что после массовой загрузки пользователей права '
+            'проверяются по базе данных, а не по claims старых токенов.'
+        )
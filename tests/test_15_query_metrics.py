@@ -0,0 +1,70 @@
+import pytest
+from reviews.models import Title
+
+from api.metrics import QueryBudgetExceeded, registry
+from tests.test_09_queries import create_titles_with_relations
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15QueryMetrics:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_headers(self, client, settings):
+        create_titles_with_relations(2)
+        response = client.get(self.TITLES_URL)
+        assert 'X-Query-Count' not in response, (
+            'Проверьте, что без DEBUG и `QUERY_METRICS_HEADERS` метрики '
+            'не отдаются клиенту в заголовках.'
+        )
+        assert 'Server-Timing' not in response
+        settings.QUERY_METRICS_HEADERS = True
+        response = client.get(self.TITLES_URL, {'year': 2000})
+        assert response['X-Query-Count'] == '3', (
+            'Проверьте, что заголовок `X-Query-Count` содержит количество '
+            'запросов к базе данных.'
+        )
+        timings = [
+            part.split(';')[0]
+            for part in response['Server-Timing'].split(', ')
+        ]
+        assert timings == ['db', 'serialize', 'render', 'total'], (
+            'Проверьте, что заголовок `Server-Timing` содержит время SQL, '
+            'сериализации, рендеринга и общее время запроса.'
+        )
+
+    def test_02_histogram(self, client):
+        create_titles_with_relations(1)
+        title = Title.objects.get()
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+        client.get(f'{self.TITLES_URL}{title.id}/')
+        stats = registry.snapshot()
+        histogram = stats['api:titles-list']['queries_histogram']
+        assert stats['api:titles-list']['requests'] == 2
+        assert (histogram['<=0'], histogram['<=3']) == (1, 1), (
+            'Проверьте, что в гистограмму попадают запросы, обслуженные '
+            'из кэша (без SQL) и из базы данных.'
+        )
+        assert stats['api:titles-detail']['max_queries'] == 2, (
+            'Проверьте, что метрики накапливаются по имени маршрута.'
+        )
+
+    def test_03_budget_exceeded(self, client, settings, caplog):
+        create_titles_with_relations(1)
+        settings.QUERY_BUDGETS = {'GET api:titles-list': 2}
+        with pytest.raises(QueryBudgetExceeded):
+            client.get(self.TITLES_URL)
+        settings.QUERY_BUDGET_ACTION = 'log'
+        response = client.get(self.TITLES_URL, {'year': 2000})
+        assert response.status_code == 200
+        assert 'api:titles-list' in caplog.text, (
+            'Проверьте, что превышение лимита запросов записывается в лог.'
+        )
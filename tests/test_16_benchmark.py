@@ -0,0 +1,72 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Comment, CustomUser, Review, Title
+
+GENERATE_OPTIONS = {
+    'titles': 40,
+    'users': 30,
+    'categories': 3,
+    'genres': 5,
+    'reviews_per_title': 5,
+    'comments_per_review': 1,
+    'seed': 1,
+    'stdout': StringIO(),
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Benchmark:
+
+    def test_01_generatedata(self):
+        call_command('generatedata', **GENERATE_OPTIONS)
+        assert Title.objects.count() == 40
+        assert CustomUser.objects.count() == 30
+        reviews = Review.objects.count()
+        assert 150 <= reviews <= 250, (
+            'Проверьте, что команда `generatedata` создаёт в среднем '
+            '`--reviews-per-title` отзывов на произведение.'
+        )
+        assert Comment.objects.exists()
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True,
+        )
+        assert sum(counts) == reviews, (
+            'Проверьте, что после генерации данных пересчитываются '
+            'рейтинги произведений.'
+        )
+        assert counts[0] >= 5 * counts[len(counts) // 2], (
+            'Проверьте, что отзывы распределены по произведениям '
+            'неравномерно (по закону Ципфа).'
+        )
+        call_command('generatedata', **GENERATE_OPTIONS)
+        assert Title.objects.count() == 80, (
+            'Проверьте, что повторный запуск `generatedata` дополняет '
+            'существующие данные.'
+        )
+
+    def test_02_benchmark_report(self, tmp_path):
+        call_command('generatedata', **GENERATE_OPTIONS)
+        output = tmp_path / 'report.json'
+        call_command(
+            'benchmark', requests=5, warmup=1, cold=True, output=str(output),
+            route=['api:titles-list', 'api:reviews-detail'],
+        )
+        report = json.loads(output.read_text(encoding='utf-8'))
+        assert set(report['endpoints']) == {
+            'api:titles-list', 'api:reviews-detail'
+        }
+        titles = report['endpoints']['api:titles-list']
+        assert titles['requests'] == 5
+        assert titles['errors'] == 0
+        assert titles['p50_ms'] <= titles['p95_ms'] <= titles['p99_ms'], (
+            'Проверьте, что отчёт `benchmark` содержит перцентили задержки.'
+        )
+        assert titles['queries']['max'] >= 1, (
+            'Проверьте, что отчёт `benchmark` содержит количество '
+            'запросов к базе данных.'
+        )
+        assert report['meta']['rows']['title'] == 40
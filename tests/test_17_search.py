@@ -0,0 +1,91 @@
+import pytest
+from reviews import search
+from reviews.models import Title
+
+TITLES = (
+    ('Гарри Поттер и философский камень', 'Мальчик узнаёт, что он волшебник'),
+    ('Властелин колец', 'Хоббит несёт кольцо в Мордор'),
+    ('Хоббит', 'Путешествие туда и обратно'),
+    ('Мастер и Маргарита', None),
+)
+
+
+@pytest.fixture(params=['fts5', 'memory'])
+def backend(request, monkeypatch):
+    if request.param == 'memory':
+        search.memory_index.invalidate()
+        monkeypatch.setattr(
+            search,
+            'get_search_backend',
+            lambda: search.InMemorySearchBackend(search.memory_index),
+        )
+    return request.param
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Search:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def create_titles(self):
+        return [
+            Title.objects.create(name=name, description=description, year=2000)
+            for name, description in TITLES
+        ]
+
+    def search_names(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_ranking(self, client, backend):
+        self.create_titles()
+        assert self.search_names(client, 'хоббит') == [
+            'Хоббит', 'Властелин колец'
+        ], (
+            'Проверьте, что фильтр `search` ищет по названию и описанию '
+            'и совпадения в названии выше совпадений в описании.'
+        )
+
+    def test_02_prefix(self, client, backend):
+        self.create_titles()
+        assert self.search_names(client, 'гар') == [
+            'Гарри Поттер и философский камень'
+        ], 'Проверьте, что слова запроса ищутся по префиксу.'
+        assert self.search_names(client, 'МАЛЬЧ волш') == [
+            'Гарри Поттер и философский камень'
+        ], (
+            'Проверьте, что поиск не учитывает регистр и требует '
+            'совпадения всех слов запроса.'
+        )
+        assert self.search_names(client, 'мальчик хоббит') == []
+        assert self.search_names(client, '!!!') == []
+
+    def test_03_index_follows_writes(self, client, backend):
+        titles = self.create_titles()
+        titles[3].name = 'Собачье сердце'
+        titles[3].save()
+        titles[1].delete()
+        assert self.search_names(client, 'сердце') == ['Собачье сердце']
+        assert self.search_names(client, 'маргарита') == []
+        assert self.search_names(client, 'кольц') == [], (
+            'Проверьте, что индекс поиска обновляется при изменении '
+            'и удалении произведений.'
+        )
+
+    def test_04_index_follows_other_processes(self):
+        search.memory_index.invalidate()
+        backend = search.InMemorySearchBackend(search.memory_index)
+        titles = self.create_titles()
+        queryset = Title.objects.all()
+        assert [
+            title.pk for title in backend.search(queryset, 'сердце')
+        ] == []
+        Title.objects.filter(pk=titles[3].pk).update(name='Собачье сердце')
+        search.bump_shared_version()
+        assert [
+            title.pk for title in backend.search(queryset, 'сердце')
+        ] == [titles[3].pk], (
+            'Проверьте, что индекс в памяти перестраивается из базы данных, '
+            'если произведения изменил другой процесс.'
+        )
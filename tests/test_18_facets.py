@@ -0,0 +1,73 @@
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+def create_catalogue():
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    for name, year, category, genres in (
+        ('Первый', 2000, movie, [drama, comedy]),
+        ('Второй', 2000, movie, [drama]),
+        ('Третий', 2010, book, [comedy]),
+        ('Четвёртый', 2010, None, []),
+    ):
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+    return drama
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Facets:
+
+    FACETS_URL = '/api/v1/titles/facets/'
+
+    def test_01_facet_counts(self, client, django_assert_num_queries):
+        create_catalogue()
+        with django_assert_num_queries(1):
+            response = client.get(self.FACETS_URL)
+        assert response.status_code == 200
+        assert response.json() == {
+            'genre': [
+                {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+                {'slug': 'drama', 'name': 'Драма', 'count': 2},
+            ],
+            'category': [
+                {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+                {'slug': 'book', 'name': 'Книга', 'count': 1},
+            ],
+            'year': [
+                {'year': 2000, 'count': 2},
+                {'year': 2010, 'count': 2},
+            ],
+        }, (
+            f'Проверьте, что `{self.FACETS_URL}` возвращает количество '
+            'произведений по жанрам, категориям и годам одним запросом.'
+        )
+
+    def test_02_facets_follow_filters(self, client):
+        create_catalogue()
+        data = client.get(self.FACETS_URL, {'genre': 'drama'}).json()
+        assert data['category'] == [
+            {'slug': 'movie', 'name': 'Фильм', 'count': 2}
+        ]
+        assert data['year'] == [{'year': 2000, 'count': 2}]
+        data = client.get(self.FACETS_URL, {'search': 'трет'}).json()
+        assert data['year'] == [{'year': 2010, 'count': 1}], (
+            'Проверьте, что фасеты учитывают параметры фильтрации списка.'
+        )
+
+    def test_03_facets_cache(self, client, django_assert_num_queries):
+        drama = create_catalogue()
+        client.get(self.FACETS_URL)
+        with django_assert_num_queries(0):
+            client.get(self.FACETS_URL)
+        Title.objects.get(name='Третий').genre.add(drama)
+        data = client.get(self.FACETS_URL).json()
+        assert data['genre'][0] == {
+            'slug': 'drama', 'name': 'Драма', 'count': 3
+        }, (
+            'Проверьте, что кэш фасетов сбрасывается при изменении '
+            'жанров произведения.'
+        )
@@ -0,0 +1,77 @@
+import pytest
+from reviews.models import Category, Review, Title
+
+
+def create_rated_titles(django_user_model):
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    users = [
+        django_user_model.objects.create_user(
+            username=f'rater{number}', email=f'rater{number}@yamdb.fake'
+        )
+        for number in range(3)
+    ]
+    for name, scores in (
+        ('Шедевр', [10, 9, 10]),
+        ('Середняк', [5, 6]),
+        ('Провал', [2]),
+        ('Без отзывов', []),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=movie)
+        for user, score in zip(users, scores):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19RatingFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_names(self, client, params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_ordering_by_rating(self, client, django_user_model):
+        create_rated_titles(django_user_model)
+        assert self.get_names(client, {'ordering': '-rating'})[:3] == [
+            'Шедевр', 'Середняк', 'Провал'
+        ], (
+            'Проверьте, что список произведений можно отсортировать '
+            'по рейтингу параметром `ordering=-rating`.'
+        )
+        assert self.get_names(client, {'ordering': '-review_count'})[:2] == [
+            'Шедевр', 'Середняк'
+        ]
+
+    def test_02_rating_filters(self, client, django_user_model):
+        create_rated_titles(django_user_model)
+        names = self.get_names(
+            client, {'rating_min': 5, 'rating_max': 9, 'ordering': 'name'}
+        )
+        assert names == ['Середняк'], (
+            'Проверьте, что произведения фильтруются по рейтингу '
+            'параметрами `rating_min` и `rating_max`.'
+        )
+        names = self.get_names(
+            client, {'reviews_min': 2, 'ordering': '-rating'}
+        )
+        assert names == ['Шедевр', 'Середняк'], (
+            'Проверьте, что произведения фильтруются по количеству отзывов '
+            'параметром `reviews_min`.'
+        )
+
+    def test_03_top_rated_uses_index(self, django_user_model):
+        create_rated_titles(django_user_model)
+        category = Category.objects.get()
+        plan = (
+            Title.objects.filter(category=category)
+            .order_by('-rating', '-id')[:10]
+            .explain()
+        )
+        assert 'title_category_rating_idx' in plan, (
+            'Проверьте, что выборка лучших произведений категории '
+            'использует индекс по (category, -rating).'
+        )
+        assert 'TEMP B-TREE' not in plan
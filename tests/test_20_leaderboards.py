@@ -0,0 +1,166 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews import leaderboards
+from reviews.models import Category, Genre, LeaderboardEntry, Review, Title
+
+
+@pytest.fixture
+def catalogue(settings, django_user_model):
+    settings.LEADERBOARD_SIZE = 2
+    fiction = Genre.objects.create(name='Фантастика', slug='sci-fi')
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    users = [
+        django_user_model.objects.create_user(
+            username=f'critic{number}', email=f'critic{number}@yamdb.fake'
+        )
+        for number in range(2)
+    ]
+    titles = {}
+    for name, score in (('Дюна', 9), ('Солярис', 7), ('Аватар', 5)):
+        title = Title.objects.create(name=name, year=2000, category=movie)
+        title.genre.set([fiction])
+        Review.objects.create(
+            title=title, author=users[0], text='Отзыв', score=score
+        )
+        titles[name] = title
+    return titles, users, movie, book
+
+
+def get_top(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return [(entry['name'], entry['rating']) for entry in response.json()]
+
+
+def get_entries():
+    return sorted(
+        LeaderboardEntry.objects.values_list(
+            'kind', 'group_id', 'title_id', 'rating', 'review_count'
+        )
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Leaderboards:
+
+    GENRE_TOP_URL = '/api/v1/genres/sci-fi/top/'
+    CATEGORY_TOP_URL = '/api/v1/categories/movie/top/'
+
+    def test_01_top(self, client, catalogue, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            top = get_top(client, self.GENRE_TOP_URL)
+        assert top == [('Дюна', 9.0), ('Солярис', 7.0)], (
+            f'Проверьте, что `{self.GENRE_TOP_URL}` возвращает '
+            'LEADERBOARD_SIZE произведений жанра с наибольшим рейтингом.'
+        )
+        assert get_top(client, self.CATEGORY_TOP_URL) == top
+        assert client.get('/api/v1/genres/unknown/top/').status_code == 404
+
+    def test_02_incremental_updates(self, client, catalogue):
+        titles, users, movie, book = catalogue
+        review = Review.objects.create(
+            title=titles['Аватар'], author=users[1], text='Отзыв', score=10
+        )
+        assert get_top(client, self.GENRE_TOP_URL) == [
+            ('Дюна', 9.0), ('Аватар', 7.5)
+        ], (
+            'Проверьте, что таблица лучших обновляется при добавлении '
+            'отзыва.'
+        )
+        review.delete()
+        assert get_top(client, self.GENRE_TOP_URL) == [
+            ('Дюна', 9.0), ('Солярис', 7.0)
+        ], (
+            'Проверьте, что при падении рейтинга место в таблице '
+            'занимает следующее по рейтингу произведение.'
+        )
+        titles['Дюна'].category = book
+        titles['Дюна'].save()
+        assert get_top(client, self.CATEGORY_TOP_URL) == [
+            ('Солярис', 7.0), ('Аватар', 5.0)
+        ]
+        assert get_top(client, '/api/v1/categories/book/top/') == [
+            ('Дюна', 9.0)
+        ]
+        titles['Солярис'].delete()
+        assert get_top(client, self.GENRE_TOP_URL) == [
+            ('Дюна', 9.0), ('Аватар', 5.0)
+        ], (
+            'Проверьте, что после удаления произведения таблица лучших '
+            'дополняется.'
+        )
+
+    def test_03_rebuild_command(self, catalogue):
+        titles, users, *_ = catalogue
+        Review.objects.create(
+            title=titles['Солярис'], author=users[1], text='Отзыв', score=10
+        )
+        titles['Дюна'].genre.clear()
+        incremental = get_entries()
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuildleaderboards', stdout=StringIO())
+        assert get_entries() == incremental, (
+            'Проверьте, что команда `rebuildleaderboards` строит те же '
+            'таблицы, что и инкрементальные обновления.'
+        )
+
+    def test_04_concurrent_updates(self, client, catalogue, monkeypatch):
+        titles, users, *_ = catalogue
+        update_board = leaderboards.update_board
+
+        def update_rebuilt_board(group, board, title):
+            # Другая транзакция уже записала таблицу, board устарел.
+            leaderboards.rebuild_group(*group)
+            update_board(group, board, title)
+
+        monkeypatch.setattr(
+            leaderboards, 'update_board', update_rebuilt_board
+        )
+        Review.objects.create(
+            title=titles['Аватар'], author=users[1], text='Отзыв', score=10
+        )
+        assert get_top(client, self.GENRE_TOP_URL) == [
+            ('Дюна', 9.0), ('Аватар', 7.5)
+        ], (
+            'Проверьте, что конфликт уникальности при одновременном '
+            'обновлении таблицы лучших исправляется её пересборкой.'
+        )
+
+        def update_partial_board(group, board, title):
+            # Таблица прочитана до того, как другая транзакция её дополнила.
+            update_board(group, board[:1], title)
+
+        monkeypatch.setattr(
+            leaderboards, 'update_board', update_partial_board
+        )
+        Review.objects.create(
+            title=titles['Солярис'], author=users[1], text='Отзыв', score=10
+        )
+        assert get_top(client, self.GENRE_TOP_URL) == [
+            ('Дюна', 9.0), ('Солярис', 8.5)
+        ], (
+            'Проверьте, что одновременные обновления не переполняют '
+            'таблицу лучших.'
+        )
+        assert LeaderboardEntry.objects.filter(
+            kind=LeaderboardEntry.Kinds.GENRE
+        ).count() == 2
+
+    def test_05_ties_by_id(self, client, catalogue):
+        titles, users, movie, _ = catalogue
+        fiction = Genre.objects.get(slug='sci-fi')
+        for name in ('Яблоко', 'Абрикос'):
+            title = Title.objects.create(name=name, year=2000, category=movie)
+            title.genre.set([fiction])
+            Review.objects.create(
+                title=title, author=users[1], text='Отзыв', score=9
+            )
+        assert get_top(client, self.GENRE_TOP_URL) == [
+            ('Абрикос', 9.0), ('Яблоко', 9.0)
+        ], (
+            'Проверьте, что при равном рейтинге выше в таблице лучших '
+            'произведение с большим id.'
+        )
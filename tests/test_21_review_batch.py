@@ -0,0 +1,170 @@
+import pytest
+from api.views import ReviewBatchView
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, LeaderboardEntry, Review, Title
+
+
+@pytest.fixture
+def titles(settings):
+    settings.LEADERBOARD_SIZE = 2
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    category = Category.objects.create(name='Фильм', slug='movie')
+    titles = []
+    for number in range(30):
+        title = Title.objects.create(
+            name=f'Фильм {number}', year=2000, category=category
+        )
+        title.genre.set([genre])
+        titles.append(title)
+    return titles
+
+
+def get_batch(titles, score=5):
+    return [
+        {'title': title.pk, 'text': 'Отзыв', 'score': score}
+        for title in titles
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ReviewBatch:
+
+    URL = '/api/v1/reviews/batch/'
+
+    def test_01_create(self, user_client, user, titles):
+        title_url = f'/api/v1/titles/{titles[0].pk}/'
+        assert user_client.get(title_url).json()['rating'] is None
+        response = user_client.post(
+            self.URL, get_batch(titles[:3], score=8), format='json'
+        )
+        assert response.status_code == 201, (
+            f'Проверьте, что POST-запрос к `{self.URL}` с корректными '
+            'отзывами возвращает статус 201.'
+        )
+        data = response.json()
+        reviews = dict(
+            Review.objects.filter(author=user).values_list('title_id', 'pk')
+        )
+        assert data == [
+            {
+                'index': index,
+                'status': 201,
+                'id': reviews[title.pk],
+                'title': title.pk,
+            }
+            for index, title in enumerate(titles[:3])
+        ], (
+            'Проверьте, что ответ содержит id созданного отзыва '
+            'для каждого элемента пакета.'
+        )
+        assert user_client.get(title_url).json()['rating'] == 8, (
+            'Проверьте, что пакетная загрузка обновляет рейтинг '
+            'произведений и сбрасывает кэш.'
+        )
+        assert LeaderboardEntry.objects.filter(
+            title_id__in=reviews
+        ).count() == 4, (
+            'Проверьте, что пакетная загрузка обновляет таблицы лучших '
+            'произведений.'
+        )
+
+    def test_02_partial(self, user_client, user, titles):
+        Review.objects.create(
+            title=titles[1], author=user, text='Отзыв', score=3
+        )
+        batch = [
+            {'title': titles[0].pk, 'text': 'Отзыв', 'score': 7},
+            {'title': titles[1].pk, 'text': 'Отзыв', 'score': 7},
+            {'title': titles[0].pk, 'text': 'Отзыв', 'score': 7},
+            {'title': 100500, 'text': 'Отзыв', 'score': 7},
+            {'title': titles[2].pk, 'text': 'Отзыв', 'score': 11},
+        ]
+        response = user_client.post(self.URL, batch, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что при частично корректном пакете '
+            'возвращается статус 207.'
+        )
+        statuses = [item['status'] for item in response.json()]
+        assert statuses == [201, 400, 400, 400, 400], (
+            'Проверьте, что ответ содержит статус каждого элемента пакета.'
+        )
+        assert set(response.json()[4]['errors']) == {'score'}
+        assert Review.objects.filter(author=user).count() == 2, (
+            'Проверьте, что отклонённые отзывы не сохраняются.'
+        )
+
+    def test_03_bad_request(self, user_client, titles):
+        batch = get_batch(titles[:1])
+        response = APIClient().post(self.URL, batch, format='json')
+        assert response.status_code in (401, 403), (
+            'Проверьте, что анонимный пользователь не может загружать отзывы.'
+        )
+        for data in ([], {'title': titles[0].pk}):
+            response = user_client.post(self.URL, data, format='json')
+            assert response.status_code == 400, (
+                'Проверьте, что пакет должен быть непустым списком.'
+            )
+
+    def test_04_max_size(self, user_client, titles, settings):
+        settings.REVIEW_BATCH_MAX_SIZE = 2
+        response = user_client.post(
+            self.URL, get_batch(titles[:3]), format='json'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что размер пакета ограничен '
+            'REVIEW_BATCH_MAX_SIZE.'
+        )
+        assert not Review.objects.exists()
+
+    def test_05_queries(self, user_client, titles):
+        counts = []
+        for batch in (titles[:2], titles[2:30]):
+            with CaptureQueriesContext(connection) as context:
+                response = user_client.post(
+                    self.URL, get_batch(batch), format='json'
+                )
+            assert response.status_code == 201
+            counts.append(
+                sum(
+                    'leaderboard' not in query['sql']
+                    for query in context.captured_queries
+                )
+            )
+        assert counts[0] == counts[1], (
+            'Проверьте, что количество запросов к базе данных '
+            'не зависит от размера пакета.'
+        )
+
+    def test_06_concurrent_conflict(self, user_client, user, titles,
+                                    monkeypatch):
+        create_reviews = ReviewBatchView.create_reviews
+
+        def create_concurrently(user, valid, accepted):
+            # Параллельный запрос успел создать отзыв после проверки.
+            Review.objects.create(
+                title=titles[1], author=user, text='Отзыв', score=3
+            )
+            return create_reviews(user, valid, accepted)
+
+        monkeypatch.setattr(
+            ReviewBatchView,
+            'create_reviews',
+            staticmethod(create_concurrently),
+        )
+        response = user_client.post(
+            self.URL, get_batch(titles[:3]), format='json'
+        )
+        assert response.status_code == 207, (
+            'Проверьте, что при конфликте с параллельно созданным отзывом '
+            'возвращается статус 207.'
+        )
+        data = response.json()
+        assert [item['status'] for item in data] == [201, 409, 201], (
+            'Проверьте, что отзыв, созданный параллельным запросом, '
+            'отклоняется со статусом 409, а не выдаётся за созданный.'
+        )
+        assert 'id' not in data[1]
+        assert Review.objects.get(author=user, title=titles[1]).score == 3
+        assert Review.objects.filter(author=user).count() == 3
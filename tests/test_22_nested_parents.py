@@ -0,0 +1,93 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.fixture
+def review(user):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Дюна', year=2021, category=category)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=8
+    )
+    Comment.objects.create(review=review, author=user, text='Комментарий')
+    return review
+
+
+def count_parent_lookups(client, method, url, table, data=None):
+    """Выполняет запрос и считает запросы родительского объекта по id."""
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data, format='json')
+    assert response.status_code < 300, (
+        f'Проверьте, что {method.upper()}-запрос к `{url}` выполняется '
+        'успешно.'
+    )
+    return sum(
+        query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+        and f'"{table}"."id" = ' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22NestedParents:
+
+    @pytest.mark.parametrize('method, suffix, data', [
+        ('get', '', None),
+        ('post', '', None),
+        ('get', '{review_id}/', None),
+        ('patch', '{review_id}/', {'text': 'Новый отзыв'}),
+    ])
+    def test_01_review_title_lookup(self, user_client, admin_client, review,
+                                    method, suffix, data):
+        client = user_client
+        if method == 'post':
+            client = admin_client
+            data = {'text': 'Отзыв', 'score': 5}
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/'
+            + suffix.format(review_id=review.pk)
+        )
+        assert count_parent_lookups(
+            client, method, url, 'reviews_title', data
+        ) == 1, (
+            f'Проверьте, что {method.upper()}-запрос к `{url}` загружает '
+            'произведение одним запросом.'
+        )
+
+    @pytest.mark.parametrize('method, suffix, data', [
+        ('get', '', None),
+        ('post', '', {'text': 'Комментарий'}),
+        ('patch', '{comment_id}/', {'text': 'Новый комментарий'}),
+    ])
+    def test_02_comment_review_lookup(self, user_client, review,
+                                      method, suffix, data):
+        comment = review.comments.get()
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+            'comments/' + suffix.format(comment_id=comment.pk)
+        )
+        assert count_parent_lookups(
+            user_client, method, url, 'reviews_review', data
+        ) == 1, (
+            f'Проверьте, что {method.upper()}-запрос к `{url}` загружает '
+            'отзыв одним запросом.'
+        )
+
+    def test_03_parent_chain(self, user_client, review):
+        other = Title.objects.create(name='Солярис', year=1972)
+        url = f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/'
+        assert user_client.get(url).status_code == 404, (
+            'Проверьте, что комментарии доступны только по отзыву '
+            'указанного произведения.'
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{review.title_id}/reviews/',
+            {'text': 'Отзыв', 'score': 5},
+            format='json',
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на произведение отклоняется.'
+        )
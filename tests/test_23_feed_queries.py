@@ -0,0 +1,70 @@
+import pytest
+from reviews.models import Category, Comment, CustomUser, Review, Title
+
+
+@pytest.fixture
+def feed():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f'author{number}', email=f'{number}@yamdb.fake')
+        for number in range(120)
+    )
+    authors = list(CustomUser.objects.order_by('pk'))
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5)
+        for author in authors
+    )
+    review = Review.objects.earliest('pk')
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='Комментарий')
+        for author in authors
+    )
+    return title, review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23FeedQueries:
+
+    @pytest.mark.parametrize('page_size', [5, 100])
+    def test_01_reviews_page(self, client, feed, page_size,
+                             django_assert_num_queries):
+        title, _ = feed
+        url = f'/api/v1/titles/{title.pk}/reviews/?page_size={page_size}'
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        results = response.json()['results']
+        assert len(results) == page_size, (
+            'Проверьте, что параметр `page_size` задаёт размер страницы '
+            'ленты отзывов.'
+        )
+        assert all(review['author'].startswith('author') for review in results)
+
+    @pytest.mark.parametrize(
+        'query', ['page_size=100', 'page_size=100&cursor=']
+    )
+    def test_02_comments_page(self, client, feed, query,
+                              django_assert_max_num_queries):
+        title, review = feed
+        url = (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            f'?{query}'
+        )
+        with django_assert_max_num_queries(3):
+            response = client.get(url)
+        results = response.json()['results']
+        assert len(results) == 100, (
+            'Проверьте, что страница из 100 комментариев загружается '
+            'постоянным количеством запросов.'
+        )
+        assert results[0]['author'].startswith('author')
+
+    def test_03_max_page_size(self, client, feed, settings):
+        title, _ = feed
+        url = f'/api/v1/titles/{title.pk}/reviews/?page_size=1000'
+        results = client.get(url).json()['results']
+        assert len(results) == settings.FEED_MAX_PAGE_SIZE, (
+            'Проверьте, что размер страницы ограничен FEED_MAX_PAGE_SIZE.'
+        )
+        response = client.get(f'{url}&cursor=')
+        assert len(response.json()['results']) == 100
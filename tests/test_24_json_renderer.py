@@ -0,0 +1,246 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import pytest
+from api import parsers, renderers
+from api.cache import GLOBAL_NAMESPACE, invalidate
+from api.views import TitleViewSet
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    Review,
+    Title,
+)
+
+PAYLOADS = [
+    [],
+    {'name': 'Сталкер', 'year': 1979, 'rating': None, 'genre': []},
+    [{'text': 'Строка\u2028с разделителем ', 'score': 10}],
+    {'price': Decimal('9.99'), 'date': date(2000, 1, 1), 'ratio': 0.1},
+    {
+        'count': 2,
+        'next': None,
+        'previous': None,
+        'results': [{'id': 1}, {'id': 2, 'tags': ['а', 'б']}],
+    },
+]
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def backend(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+    return request.param
+
+
+class Test24JSONRenderer:
+
+    @pytest.mark.parametrize('data', PAYLOADS)
+    def test_01_byte_parity(self, backend, data):
+        expected = JSONRenderer().render(data)
+        assert renderers.FastJSONRenderer().render(data) == expected, (
+            'Проверьте, что FastJSONRenderer кодирует данные побайтно '
+            'так же, как JSONRenderer из DRF.'
+        )
+        indented = renderers.FastJSONRenderer().render(
+            data, 'application/json; indent=2'
+        )
+        assert indented == JSONRenderer().render(
+            data, 'application/json; indent=2'
+        )
+
+    def test_02_byte_parity_edge_cases(self, backend):
+        data = {
+            'pub_date': datetime(2020, 1, 1, 12, 30, tzinfo=timezone.utc),
+            'created': datetime(2020, 1, 1, 12, 30, 0, 500),
+            'keys': {1: 'один', None: 'нет', 2.5: 'дробь'},
+        }
+        assert renderers.FastJSONRenderer().render(data) == (
+            JSONRenderer().render(data)
+        ), (
+            'Проверьте, что FastJSONRenderer кодирует даты и ключи словаря, '
+            'которые не являются строками, так же, как JSONRenderer из DRF.'
+        )
+        for value in (float('nan'), float('inf')):
+            with pytest.raises(ValueError):
+                JSONRenderer().render({'rating': [value]})
+            with pytest.raises(ValueError):
+                renderers.FastJSONRenderer().render({'rating': [value]})
+
+    def test_03_parser(self, backend):
+        parser = parsers.FastJSONParser()
+        content = JSONRenderer().render(PAYLOADS[4])
+        assert parser.parse(BytesIO(content)) == json.loads(content)
+        with pytest.raises(ParseError):
+            parser.parse(BytesIO(b'{"name": '))
+        with pytest.raises(ParseError):
+            parser.parse(BytesIO(b'{"score": NaN}'))
+
+    def test_04_missing_dependencies(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(renderers, 'msgpack', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'msgpack', None)
+        content = renderers.FastJSONRenderer().render(PAYLOADS[1])
+        assert content == JSONRenderer().render(PAYLOADS[1]), (
+            'Проверьте, что без orjson FastJSONRenderer кодирует ответы '
+            'стандартным модулем json.'
+        )
+        assert parsers.FastJSONParser().parse(BytesIO(content)) == (
+            PAYLOADS[1]
+        )
+        for renderer_or_parser in (
+            renderers.MessagePackRenderer,
+            parsers.MessagePackParser,
+        ):
+            with pytest.raises(ImproperlyConfigured):
+                renderer_or_parser()
+
+    @pytest.mark.parametrize('data', PAYLOADS[:3] + [[{'id': 1}] * 5])
+    @pytest.mark.parametrize(
+        'media_type', [None, 'application/json; indent=2']
+    )
+    def test_05_iter_render(self, backend, data, media_type):
+        renderer = renderers.FastJSONRenderer()
+        if not isinstance(data, list):
+            data = [data]
+        chunks = [data[start:start + 2] for start in range(0, len(data), 2)]
+        content = b''.join(renderer.iter_render(iter(chunks), media_type))
+        assert content == JSONRenderer().render(data, media_type), (
+            'Проверьте, что кодирование списка частями даёт тот же '
+            'результат, что и JSONRenderer из DRF.'
+        )
+
+
+@pytest.fixture
+def reviews():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f'author{number}', email=f'{number}@yamdb.fake')
+        for number in range(30)
+    )
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв\u2028', score=5)
+        for author in CustomUser.objects.filter(username__startswith='author')
+    )
+    Comment.objects.create(
+        review=Review.objects.first(),
+        author=CustomUser.objects.first(),
+        text='Комментарий',
+    )
+    return title
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+    for number in range(9):
+        title = Title.objects.create(
+            name=f'Фильм\u2028{number}',
+            year=2000 + number,
+            category=None if number == 4 else category,
+        )
+        title.genre.set(genres[:number % 3])
+
+
+@pytest.fixture
+def unpaginated(monkeypatch):
+    monkeypatch.setattr(TitleViewSet, 'pagination_class', None)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24JSONApi:
+
+    def test_01_parser_in_api(self, admin_client, reviews):
+        response = admin_client.post(
+            f'/api/v1/titles/{reviews.pk}/reviews/',
+            data=b'{"text": "\\u041e\\u0442\\u0437\\u044b\\u0432", '
+                 b'"score": 7}',
+            content_type='application/json',
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что API принимает JSON в теле запроса.'
+        )
+        assert response.json()['text'] == 'Отзыв'
+        response = admin_client.post(
+            f'/api/v1/titles/{reviews.pk}/reviews/',
+            data=b'{"text": ',
+            content_type='application/json',
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что некорректный JSON в запросе возвращает 400.'
+        )
+
+    def test_02_benchmark_command(self, reviews, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command(
+            'benchmarkjson', iterations=3, output=str(output),
+            stdout=StringIO(),
+        )
+        report = json.loads(output.read_text(encoding='utf-8'))
+        assert set(report['payloads']) == {'titles', 'reviews'}
+        for payload in report['payloads'].values():
+            assert payload['identical'], (
+                'Проверьте, что быстрый рендерер даёт тот же JSON, что '
+                'и стандартный.'
+            )
+            assert payload['json']['bytes'] == payload['fast']['bytes']
+            assert payload['render_speedup'] > 0
+
+    def test_03_streaming_list(
+        self, client, titles, unpaginated, settings,
+        django_assert_num_queries,
+    ):
+        settings.FAST_READ_PATH = False
+        expected = client.get('/api/v1/titles/').content
+        assert len(json.loads(expected)) == 9
+        settings.FAST_READ_PATH = True
+        settings.JSON_STREAMING_CHUNK_SIZE = 2
+        invalidate(GLOBAL_NAMESPACE)
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/')
+        assert response.streaming, (
+            'Проверьте, что список без пагинации длиннее '
+            '`JSON_STREAMING_CHUNK_SIZE` отдаётся потоком.'
+        )
+        assert response['Content-Type'] == 'application/json'
+        with django_assert_num_queries(4):
+            chunks = list(response.streaming_content)
+        assert len(chunks) == 6, (
+            'Проверьте, что потоковый ответ читает строки из базы '
+            'и кодирует их частями по `JSON_STREAMING_CHUNK_SIZE`.'
+        )
+        assert b''.join(chunks) == expected, (
+            'Проверьте, что потоковый ответ совпадает с ответом '
+            'сериализатора.'
+        )
+        assert client.get('/api/v1/titles/').streaming, (
+            'Проверьте, что потоковые ответы не кэшируются.'
+        )
+
+    def test_04_short_list_not_streamed(
+        self, client, titles, unpaginated, settings
+    ):
+        settings.JSON_STREAMING_CHUNK_SIZE = 10
+        response = client.get('/api/v1/titles/')
+        assert not response.streaming, (
+            'Проверьте, что список короче `JSON_STREAMING_CHUNK_SIZE` '
+            'отдаётся обычным ответом.'
+        )
+        assert len(response.json()) == 9
+        settings.JSON_STREAMING_CHUNK_SIZE = 2
+        assert client.get('/api/v1/titles/').content == response.content
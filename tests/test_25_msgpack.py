@@ -0,0 +1,82 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+import msgpack
+import pytest
+from api.renderers import MessagePackRenderer
+from reviews.models import Category, Genre, Review, Title
+
+MSGPACK = 'application/msgpack'
+
+
+@pytest.fixture
+def title(user):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(
+        name='Сталкер', year=1979, category=category,
+        description='Фильм Андрея Тарковского',
+    )
+    title.genre.set([genre])
+    Review.objects.create(title=title, author=user, text='Отзыв', score=9)
+    return title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25MessagePack:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/',
+        '/api/v1/titles/{title_id}/',
+        '/api/v1/titles/{title_id}/reviews/',
+    ])
+    def test_01_negotiation(self, client, title, url):
+        url = url.format(title_id=title.pk)
+        response = client.get(url)
+        assert response['Content-Type'] == 'application/json', (
+            'Проверьте, что по умолчанию API отвечает в JSON.'
+        )
+        data = response.json()
+        response = client.get(url, HTTP_ACCEPT=MSGPACK)
+        assert response['Content-Type'] == MSGPACK, (
+            f'Проверьте, что при `Accept: {MSGPACK}` API отвечает '
+            'в MessagePack.'
+        )
+        assert msgpack.unpackb(response.content) == data, (
+            'Проверьте, что ответ в MessagePack содержит те же данные, '
+            'что и в JSON.'
+        )
+        assert len(response.content) < len(json.dumps(data).encode())
+        response = client.get(url)
+        assert response['Content-Type'] == 'application/json', (
+            'Проверьте, что ответы в разных форматах кэшируются отдельно.'
+        )
+
+    def test_02_parser(self, admin_client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = admin_client.post(
+            url,
+            data=msgpack.packb({'text': 'Отзыв', 'score': 7}),
+            content_type=MSGPACK,
+            HTTP_ACCEPT=MSGPACK,
+        )
+        assert response.status_code == 201, (
+            f'Проверьте, что API принимает тело запроса в `{MSGPACK}`.'
+        )
+        data = msgpack.unpackb(response.content)
+        assert (data['text'], data['score']) == ('Отзыв', 7)
+        response = admin_client.post(
+            url, data=b'\x82\xa4text', content_type=MSGPACK
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что некорректное тело в MessagePack возвращает 400.'
+        )
+
+    def test_03_renderer_types(self):
+        data = {'price': Decimal('9.99'), 'date': date(2000, 1, 1)}
+        content = MessagePackRenderer().render(data)
+        assert msgpack.unpackb(content) == {
+            'price': 9.99, 'date': '2000-01-01'
+        }
+        assert MessagePackRenderer().render(None) == b''
@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.fixture
+def titles(user):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Фантастика', slug='sci-fi'),
+    ]
+    titles = []
+    for number in range(3):
+        title = Title.objects.create(
+            name=f'Фильм {number}', year=2000, category=category,
+            description='Длинное описание ' * 20,
+        )
+        title.genre.set(genres)
+        Review.objects.create(
+            title=title, author=user, text='Отзыв', score=number + 5
+        )
+        titles.append(title)
+    return titles
+
+
+def get_sql(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200.'
+    )
+    return response.json(), ' '.join(
+        query['sql'] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26SparseFields:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_titles_fields(self, client, titles,
+                              django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.get(f'{self.TITLES_URL}?fields=id,name')
+        results = response.json()['results']
+        assert [set(title) for title in results] == [{'id', 'name'}] * 3, (
+            'Проверьте, что параметр `fields` оставляет в ответе только '
+            'перечисленные поля.'
+        )
+        data, sql = get_sql(client, f'{self.TITLES_URL}?fields=id,rating')
+        assert 'description' not in sql and 'reviews_category' not in sql, (
+            'Проверьте, что колонки и связи невыбранных полей '
+            'не загружаются из базы данных.'
+        )
+        assert 'rating' in data['results'][0]
+
+    def test_02_title_detail(self, client, titles,
+                             django_assert_num_queries):
+        url = f'{self.TITLES_URL}{titles[0].pk}/'
+        full = client.get(url).json()
+        with django_assert_num_queries(2):
+            response = client.get(f'{url}?fields=name,genre,category')
+        assert response.json() == {
+            'name': full['name'],
+            'genre': full['genre'],
+            'category': full['category'],
+        }
+        with django_assert_num_queries(1):
+            response = client.get(f'{url}?fields=name')
+        assert response.json() == {'name': full['name']}
+
+    def test_03_unknown_fields(self, client, titles):
+        response = client.get(f'{self.TITLES_URL}?fields=name,secret')
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестное поле в `fields` возвращает 400.'
+        )
+        assert 'fields' in response.json()
+        response = client.get(f'{self.TITLES_URL}?expand=category')
+        assert response.status_code == 400
+        assert 'expand' in response.json()
+
+    def test_04_reviews_expand(self, client, titles, user):
+        url = f'/api/v1/titles/{titles[0].pk}/reviews/'
+        data, _ = get_sql(client, f'{url}?expand=author')
+        author = data['results'][0]['author']
+        assert author == {'username': user.username}, (
+            'Проверьте, что `expand=author` встраивает автора отзыва '
+            'объектом только с публичными полями.'
+        )
+        data, sql = get_sql(client, f'{url}?fields=id,score')
+        assert set(data['results'][0]) == {'id', 'score'}
+        assert 'reviews_customuser' not in sql, (
+            'Проверьте, что без поля `author` автор не загружается.'
+        )
+        assert client.get(url).json()['results'][0]['author'] == (
+            user.username
+        )
+
+    def test_05_comments_expand(self, client, titles, user):
+        review = Review.objects.filter(title=titles[0]).get()
+        review.comments.create(author=user, text='Комментарий')
+        url = f'/api/v1/titles/{titles[0].pk}/reviews/{review.pk}/comments/'
+        data, _ = get_sql(client, f'{url}?fields=text,author&expand=author')
+        assert data['results'] == [
+            {
+                'text': 'Комментарий',
+                'author': {'username': user.username},
+            }
+        ]
@@ -0,0 +1,107 @@
+import pytest
+from api.cache import GLOBAL_NAMESPACE, invalidate
+from api.serializers import (
+    CategorySerializer,
+    GenreSerializer,
+    TitleGetSerializer,
+)
+from reviews.models import Category, CustomUser, Genre, Review, Title
+
+URLS = [
+    '/api/v1/categories/',
+    '/api/v1/categories/?search=Фи',
+    '/api/v1/genres/',
+    '/api/v1/genres/?page=2',
+    '/api/v1/titles/',
+    '/api/v1/titles/?page=2',
+    '/api/v1/titles/?genre=drama',
+    '/api/v1/titles/?ordering=-rating',
+    '/api/v1/titles/?ordering=year&rating_min=5',
+    '/api/v1/titles/?search=Сталкер',
+    '/api/v1/titles/?category=none',
+]
+
+
+@pytest.fixture
+def catalogue():
+    categories = [
+        Category.objects.create(name='Фильм', slug='movie'),
+        Category.objects.create(name='Книга', slug='book'),
+    ]
+    genres = [
+        Genre.objects.create(name=name, slug=slug)
+        for name, slug in (
+            ('Драма', 'drama'), ('Фантастика', 'sci-fi'),
+            ('Комедия', 'comedy'), ('Детектив', 'detective'),
+            ('Ужасы', 'horror'), ('Вестерн', 'western'),
+        )
+    ]
+    authors = [
+        CustomUser.objects.create(
+            username=f'critic{number}', email=f'critic{number}@yamdb.fake'
+        )
+        for number in range(2)
+    ]
+    descriptions = [None, '', 'Описание с «кавычками» и "escape"\n']
+    for number in range(9):
+        title = Title.objects.create(
+            name=f'Сталкер {number}' if number % 3 else f'Фильм {number}',
+            year=1970 + number,
+            category=None if number == 4 else categories[number % 2],
+            description=descriptions[number % 3],
+        )
+        title.genre.set(genres[:number % 4])
+        for author, score in zip(authors, (number + 1, 10 - number % 3)):
+            if number % 5:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=score
+                )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27FastReadPath:
+
+    @pytest.mark.parametrize('url', URLS)
+    def test_01_golden_parity(self, client, catalogue, settings, url):
+        settings.FAST_READ_PATH = False
+        expected = client.get(url)
+        assert expected.status_code == 200
+        invalidate(GLOBAL_NAMESPACE)
+        settings.FAST_READ_PATH = True
+        response = client.get(url)
+        assert response.content == expected.content, (
+            f'Проверьте, что быстрый путь для `{url}` возвращает ответ, '
+            'побайтно совпадающий с ответом сериализатора.'
+        )
+
+    @pytest.mark.parametrize('url, serializer', [
+        ('/api/v1/categories/', CategorySerializer),
+        ('/api/v1/genres/', GenreSerializer),
+        ('/api/v1/titles/', TitleGetSerializer),
+    ])
+    def test_02_serializers_skipped(self, client, catalogue, monkeypatch,
+                                    url, serializer):
+        def fail(*args, **kwargs):
+            raise AssertionError('Сериализатор не должен вызываться.')
+
+        monkeypatch.setattr(serializer, 'to_representation', fail)
+        assert client.get(url).status_code == 200, (
+            f'Проверьте, что список `{url}` строится без сериализатора.'
+        )
+
+    def test_03_query_count(self, client, catalogue,
+                            django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 5
+
+    def test_04_sparse_fields(self, client, catalogue, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError('Быстрый путь не должен вызываться.')
+
+        monkeypatch.setattr('api.fastpath.TitleValuesMapper.represent', fail)
+        response = client.get('/api/v1/titles/?fields=id,name')
+        assert set(response.json()['results'][0]) == {'id', 'name'}, (
+            'Проверьте, что при параметре `fields` список строится '
+            'сериализатором.'
+        )
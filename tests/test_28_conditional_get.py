@@ -0,0 +1,197 @@
+import time
+
+import pytest
+from api.cache import GLOBAL_NAMESPACE, get_cache, get_modified_key
+from django.utils.http import http_date
+from reviews.models import Category, Review, Title
+
+
+@pytest.fixture
+def title(user):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Сталкер', year=1979, category=category)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=9
+    )
+    review.comments.create(author=user, text='Комментарий')
+    return title
+
+
+def make_stale(*namespaces):
+    """Переносит время последнего изменения на минуту назад."""
+    get_cache().set_many(
+        {
+            get_modified_key(namespace): time.time() - 60
+            for namespace in (GLOBAL_NAMESPACE, *namespaces)
+        },
+        None,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28ConditionalGet:
+
+    def get_urls(self, title):
+        review = title.reviews.get()
+        comment = review.comments.get()
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        return [
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title.pk}/',
+            reviews_url,
+            f'{reviews_url}{review.pk}/',
+            comments_url,
+            f'{comments_url}{comment.pk}/',
+        ]
+
+    def test_01_if_none_match(self, client, title,
+                              django_assert_num_queries):
+        for url in self.get_urls(title):
+            response = client.get(url)
+            assert response.status_code == 200
+            etag = response.get('ETag')
+            assert etag, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` '
+                'содержит заголовок ETag.'
+            )
+            with django_assert_num_queries(0):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает 304 без запросов к базе данных.'
+            )
+            assert response.content == b''
+            assert response['ETag'] == etag
+
+    def test_02_etag_changes(self, client, user_client, title):
+        review = title.reviews.get()
+        comment = review.comments.get()
+        urls = self.get_urls(title)
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        comment.text = 'Новый комментарий'
+        comment.save()
+        changed = [
+            url for url in urls if client.get(url)['ETag'] != etags[url]
+        ]
+        assert changed == urls[-2:], (
+            'Проверьте, что изменение комментария меняет ETag только '
+            'комментариев этого отзыва.'
+        )
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        response = user_client.patch(urls[5], data={'score': 3})
+        assert response.status_code == 200
+        changed = [
+            url for url in urls if client.get(url)['ETag'] != etags[url]
+        ]
+        assert changed == urls[2:6], (
+            'Проверьте, что изменение отзыва меняет ETag произведений '
+            'и отзывов.'
+        )
+        response = client.get(urls[5], HTTP_IF_NONE_MATCH=etags[urls[5]])
+        assert response.status_code == 200
+        assert response.json()['score'] == 3
+
+    def test_03_if_modified_since(self, client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client.get(url)
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что Last-Modified не отдаётся, пока не закончилась '
+            'секунда последнего изменения.'
+        )
+        make_stale(f'reviews:{title.pk}')
+        response = client.get(url)
+        last_modified = response.get('Last-Modified')
+        assert last_modified, (
+            'Проверьте, что ответ содержит заголовок Last-Modified.'
+        )
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304, (
+            'Проверьте, что GET-запрос с актуальным `If-Modified-Since` '
+            'возвращает 304.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() - 3600)
+        )
+        assert response.status_code == 200
+
+    def test_04_users(self, admin_client, user_client, admin, user):
+        user_etag = user_client.get('/api/v1/users/me/')['ETag']
+        admin_etag = admin_client.get('/api/v1/users/me/')['ETag']
+        assert user_etag != admin_etag, (
+            'Проверьте, что ETag зависит от пользователя.'
+        )
+        response = admin_client.get(
+            '/api/v1/users/me/', HTTP_IF_NONE_MATCH=user_etag
+        )
+        assert response.status_code == 200
+        response = user_client.get(
+            '/api/v1/users/me/', HTTP_IF_NONE_MATCH=user_etag
+        )
+        assert response.status_code == 304
+        url = f'/api/v1/users/{user.username}/'
+        etag = admin_client.get(url)['ETag']
+        user.bio = 'Новое описание'
+        user.save()
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение пользователя меняет ETag.'
+        )
+        assert response.json()['bio'] == 'Новое описание'
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 403, (
+            'Проверьте, что права доступа проверяются до ответа 304.'
+        )
+
+    def test_05_deleted_parent(self, client, title):
+        review = title.reviews.get()
+        review.comments.all().delete()
+        comments_url = (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        )
+        etag = client.get(comments_url)['ETag']
+        review.delete()
+        for headers in ({}, {'HTTP_IF_NONE_MATCH': etag}):
+            response = client.get(comments_url, **headers)
+            assert response.status_code == 404, (
+                'Проверьте, что после удаления отзыва без комментариев '
+                'его список комментариев не отдаётся из кэша.'
+            )
+        reviews_url = f'/api/v1/titles/0{title.pk}/reviews/'
+        assert client.get(reviews_url).json()['results'] == []
+        etag = client.get(reviews_url)['ETag']
+        title.delete()
+        for headers in ({}, {'HTTP_IF_NONE_MATCH': etag}):
+            response = client.get(reviews_url, **headers)
+            assert response.status_code == 404, (
+                'Проверьте, что после удаления произведения без отзывов '
+                'его список отзывов не отдаётся из кэша.'
+            )
+
+    def test_06_author_changes(self, client, title, user,
+                               django_user_model):
+        urls = self.get_urls(title)[4:]
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        django_user_model.objects.create_user(
+            username='newcomer', email='newcomer@yamdb.fake'
+        )
+        user.bio = 'Новое описание'
+        user.save()
+        changed = [
+            url for url in urls if client.get(url)['ETag'] != etags[url]
+        ]
+        assert changed == [], (
+            'Проверьте, что регистрация пользователей и изменение полей, '
+            'которых нет в отзывах и комментариях, не сбрасывает их кэш.'
+        )
+        user.username = 'RenamedUser'
+        user.save()
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == 200, (
+                'Проверьте, что смена имени автора сбрасывает кэш его '
+                'отзывов и комментариев.'
+            )
+        assert client.get(urls[1]).json()['author'] == 'RenamedUser'
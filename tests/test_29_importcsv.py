@@ -0,0 +1,240 @@
+import csv
+import os
+import shutil
+import threading
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from reviews import leaderboards
+from reviews.management.commands import importcsv
+from reviews.management.datafiles import TABLES, find_data_file
+from reviews.models import Comment, LeaderboardEntry, Review
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(DATA_DIR, path)
+    return path
+
+
+def rewrite_csv(path, change):
+    """Перезаписывает csv, пропуская каждую строку через change."""
+    with open(path, newline='', encoding='utf-8') as file:
+        header, *rows = list(csv.reader(file))
+    rows = [change(dict(zip(header, row))) for row in rows]
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(
+            [row[column] for column in header] for row in rows if row
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29ImportCsv:
+
+    def test_01_batched_inserts(self):
+        with CaptureQueriesContext(connection) as context:
+            call_command('importcsv', path=DATA_DIR, batch_size=10,
+                         stdout=StringIO())
+        inserts = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "reviews_review"')
+        ]
+        assert len(inserts) == 8, (
+            'Проверьте, что команда `importcsv` записывает строки пачками '
+            'по `--batch-size` через bulk_create.'
+        )
+        assert Review.objects.count() == 72
+
+    def test_02_pub_date_per_row(self, data_dir):
+        def drop_first_date(row):
+            if row['id'] == '1':
+                row['pub_date'] = ''
+            return row
+
+        rewrite_csv(data_dir / 'comments.csv', drop_first_date)
+        started = timezone.now()
+        call_command('importcsv', path=str(data_dir), stdout=StringIO())
+        assert str(Comment.objects.get(pk=2).pub_date.date()) == (
+            '2020-01-13'
+        ), (
+            'Проверьте, что команда `importcsv` сохраняет даты публикации '
+            'из файлов.'
+        )
+        assert Comment.objects.get(pk=1).pub_date >= started, (
+            'Проверьте, что строке без даты публикации ставится '
+            'текущее время.'
+        )
+        comment = Comment.objects.create(
+            review=Review.objects.first(),
+            author_id=100,
+            text='Комментарий',
+        )
+        assert timezone.now() - comment.pub_date < timedelta(minutes=1), (
+            'Проверьте, что импорт не меняет поведение даты публикации '
+            'для новых объектов.'
+        )
+
+    def get_tasks(self):
+        return {
+            model: (find_data_file(DATA_DIR, name), model.__name__)
+            for name, model, _ in TABLES
+        }
+
+    def test_03_parallel_dependencies(self, monkeypatch):
+        command = importcsv.Command()
+        dependencies = importcsv.get_dependencies(list(self.get_tasks()))
+        independent = [
+            model for model, related in dependencies.items() if not related
+        ]
+        barrier = threading.Barrier(len(independent), timeout=5)
+        lock = threading.Lock()
+        loaded = []
+
+        def import_table(data_file, model):
+            with lock:
+                assert dependencies[model] <= set(loaded), (
+                    f'Таблица {model.__name__} загружается раньше таблиц, '
+                    'на которые она ссылается.'
+                )
+            if model in independent:
+                barrier.wait()
+            with lock:
+                loaded.append(model)
+            return Counter(created=1), 0.0
+
+        monkeypatch.setattr(command, 'import_table', import_table)
+        results = list(command.import_parallel(self.get_tasks(), workers=3))
+        assert sorted(message for message, _, _ in results) == sorted(
+            model.__name__ for _, model, _ in TABLES
+        )
+        assert len(loaded) == len(TABLES), (
+            'Проверьте, что при `--workers` больше 1 независимые таблицы '
+            'загружаются одновременно, а остальные - после своих '
+            'зависимостей.'
+        )
+
+    def test_04_parallel_cycle(self, monkeypatch):
+        def get_dependencies(models):
+            dependencies = {model: set() for model in models}
+            dependencies[Review] = {Comment}
+            dependencies[Comment] = {Review}
+            return dependencies
+
+        monkeypatch.setattr(importcsv, 'get_dependencies', get_dependencies)
+        command = importcsv.Command()
+        monkeypatch.setattr(
+            command,
+            'import_table',
+            lambda data_file, model: (Counter(created=1), 0.0),
+        )
+        with pytest.raises(CommandError, match='Циклическая зависимость'):
+            list(command.import_parallel(self.get_tasks(), workers=2))
+
+    def test_05_upsert_unchanged_rerun(self, data_dir):
+        call_command('importcsv', path=str(data_dir), stdout=StringIO())
+        output = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command('importcsv', path=str(data_dir), upsert=True,
+                         stdout=output)
+        imported = tuple(
+            f'{statement} "{model._meta.db_table}"'
+            for _, model, _ in TABLES
+            for statement in ('INSERT INTO', 'UPDATE')
+        )
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(imported)
+        ]
+        assert writes == [], (
+            'Проверьте, что повторная загрузка тех же файлов в режиме '
+            '`--upsert` ничего не записывает в базу данных.'
+        )
+        assert 'Отзывы загружены: 72 строк' in output.getvalue()
+        assert 'новых 0, изменённых 0, без изменений 72' in output.getvalue()
+
+    def test_06_upsert_new_and_changed_rows(self, data_dir):
+        call_command('importcsv', path=str(data_dir), stdout=StringIO())
+
+        def change_comments(row):
+            if row['id'] == '1':
+                row['text'] = 'Изменённый комментарий'
+            return row
+
+        rewrite_csv(data_dir / 'comments.csv', change_comments)
+        with open(data_dir / 'comments.csv', 'a', encoding='utf-8') as file:
+            file.write('10,6,Новый комментарий,100,2021-01-01T00:00:00Z\n')
+        output = StringIO()
+        call_command('importcsv', path=str(data_dir), upsert=True,
+                     stdout=output)
+        assert 'новых 1, изменённых 1, без изменений 2' in output.getvalue(), (
+            'Проверьте, что режим `--upsert` добавляет новые строки '
+            'и обновляет только изменённые.'
+        )
+        assert Comment.objects.get(pk=1).text == 'Изменённый комментарий'
+        assert Comment.objects.get(pk=10).text == 'Новый комментарий'
+
+    def test_07_upsert_requires_pk(self, data_dir):
+        with open(data_dir / 'genre.csv', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        with open(data_dir / 'genre.csv', 'w', encoding='utf-8') as file:
+            file.write('\n'.join(line.split(',', 1)[1] for line in lines))
+        with pytest.raises(CommandError, match='первичного ключа'):
+            call_command('importcsv', path=str(data_dir), upsert=True,
+                         stdout=StringIO())
+
+    def test_08_upsert_updates_touched_leaderboards(self, data_dir,
+                                                    monkeypatch):
+        call_command('importcsv', path=str(data_dir), stdout=StringIO())
+
+        def change_title(row):
+            if row['id'] == '1':
+                row['category'] = '2'
+            return row
+
+        def change_genre(row):
+            if row['id'] == '1':
+                row['genre_id'] = '2'
+            return row
+
+        def change_review(row):
+            if row['id'] == '30':
+                row['score'] = '1'
+            return row
+
+        rewrite_csv(data_dir / 'titles.csv', change_title)
+        rewrite_csv(data_dir / 'genre_title.csv', change_genre)
+        rewrite_csv(data_dir / 'review.csv', change_review)
+        rebuild = leaderboards.rebuild
+
+        def fail_rebuild():
+            raise AssertionError(
+                'Проверьте, что `importcsv --upsert` обновляет таблицы '
+                'лучших только затронутых произведений, без полной '
+                'пересборки.'
+            )
+
+        monkeypatch.setattr(leaderboards, 'rebuild', fail_rebuild)
+        call_command('importcsv', path=str(data_dir), upsert=True,
+                     stdout=StringIO())
+        entries = sorted(LeaderboardEntry.objects.values_list(
+            'kind', 'group_id', 'title_id', 'rating', 'review_count'
+        ))
+        rebuild()
+        assert entries == sorted(LeaderboardEntry.objects.values_list(
+            'kind', 'group_id', 'title_id', 'rating', 'review_count'
+        )), (
+            'Проверьте, что после `importcsv --upsert` таблицы лучших '
+            'совпадают с полностью пересобранными.'
+        )